@@ -0,0 +1,61 @@
+"""UGX amounts as the memo prints them: digit groups and words.
+
+ugx() and format_costs() give "12,000" style text for one amount or a whole
+cost column; words() gives "TWELVE THOUSAND" for the memo subject. num2words
+is only imported the first time words() is called, and its results are kept
+in a bounded LRU cache: month totals and vehicle counts repeat across a batch
+of memos, and num2words is slow compared to everything else on the line.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+WORDS_CACHE_SIZE = 4096
+
+# format_costs() lays out up to 18 digits in fixed-width rows with commas
+# between the three-digit groups; longer or negative amounts are rare and
+# formatted one by one.
+_DIGITS = 18
+_POWERS = 10 ** np.arange(_DIGITS - 1, -1, -1, dtype=np.int64)
+_DIGIT_COLUMNS = np.arange(_DIGITS) + np.arange(_DIGITS) // 3
+_TEXT_WIDTH = _DIGITS + _DIGITS // 3 - 1
+
+
+def ugx(amount):
+    """One amount with thousands separators; a missing amount is blank."""
+    if amount is None or pd.isna(amount):
+        return ""
+    return f"{int(amount):,}"
+
+
+def format_costs(costs):
+    """Render an Int64 cost column with thousands separators; missing costs are blank.
+
+    The digits are computed with array arithmetic into a grid of characters
+    that is read back as strings, so no Python formatting runs per cell.
+    """
+    present = costs.notna().to_numpy()
+    values = costs.to_numpy(dtype="int64", na_value=0)
+    magnitudes = np.abs(values)
+    chars = np.full((len(values), _TEXT_WIDTH), ord(","), dtype=np.uint32)
+    chars[:, _DIGIT_COLUMNS] = magnitudes[:, None] // _POWERS % 10 + ord("0")
+    # "000,000,012,500" -> "12,500"
+    text = np.char.lstrip(chars.view(f"<U{_TEXT_WIDTH}").ravel(), "0,").astype(object)
+    text[values == 0] = "0"
+    odd = (values < 0) | (magnitudes >= 10 ** _DIGITS) | (values == np.iinfo(np.int64).min)
+    text[odd] = [f"{value:,}" for value in values[odd].tolist()]
+    text[~present] = ""
+    return pd.Series(text, index=costs.index, dtype=object)
+
+
+@functools.lru_cache(maxsize=WORDS_CACHE_SIZE)
+def _words(number):
+    from num2words import num2words
+
+    return num2words(number, lang="en").upper()
+
+
+def words(amount):
+    """`amount` in upper-case English words, e.g. 12000 -> "TWELVE THOUSAND"."""
+    return _words(int(amount))
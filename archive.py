@@ -0,0 +1,219 @@
+"""Month-partitioned Parquet archive of the ledger, with cost rollups.
+
+Every submission month (the month of a ledger sheet's %d-%m-%Y name) is kept
+as one Parquet file, static/archive/repairs_YYYY-MM.parquet, holding that
+month's repair lines with the vehicle block columns filled in. Queries read
+only the partitions in the requested month range, and only the columns they
+need, so multi-year fleet reports never touch the ledger or any workbook.
+
+Partitions are refreshed by sync(): SQLite triggers record which ledger
+sheets changed, and only the months those sheets belong to are rewritten.
+
+    python archive.py sync
+    python archive.py rollup vehicle|area|month [--from YYYY-MM] [--to YYYY-MM]
+                             [--area AREA] [--vehicle VEHICLE]
+
+Needs pyarrow (or fastparquet) for pandas' Parquet support.
+"""
+import argparse
+import datetime
+import glob
+import os
+import re
+import sys
+from contextlib import closing
+
+import pandas as pd
+
+import ledger
+import schema
+from write_coordinator import atomic_write, file_lock
+
+ARCHIVE_DIR = os.path.join("static", "archive")
+
+GROUPINGS = {
+    "vehicle": ["Vehicle ID"],
+    "area": ["Area"],
+    "month": ["Month"],
+}
+
+_PARTITION = re.compile(r"repairs_(\d{4}-\d{2})\.parquet$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_dirty (
+    sheet TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archive_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TRIGGER IF NOT EXISTS archive_dirty_insert AFTER INSERT ON repairs BEGIN
+    INSERT OR REPLACE INTO archive_dirty (sheet, version)
+    VALUES (NEW.sheet, (SELECT COALESCE(MAX(version), 0) + 1 FROM archive_dirty));
+END;
+CREATE TRIGGER IF NOT EXISTS archive_dirty_update AFTER UPDATE ON repairs BEGIN
+    INSERT OR REPLACE INTO archive_dirty (sheet, version)
+    VALUES (NEW.sheet, (SELECT COALESCE(MAX(version), 0) + 1 FROM archive_dirty));
+END;
+CREATE TRIGGER IF NOT EXISTS archive_dirty_delete AFTER DELETE ON repairs BEGIN
+    INSERT OR REPLACE INTO archive_dirty (sheet, version)
+    VALUES (OLD.sheet, (SELECT COALESCE(MAX(version), 0) + 1 FROM archive_dirty));
+END;
+"""
+
+
+def connect(db_file=ledger.DB_FILE):
+    conn = ledger.connect(db_file)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def sheet_month(sheet):
+    """"YYYY-MM" of a ledger sheet name (%d-%m-%Y), or None if it is not a date."""
+    try:
+        return datetime.datetime.strptime(sheet, "%d-%m-%Y").strftime("%Y-%m")
+    except ValueError:
+        return None
+
+
+def partition_path(month, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"repairs_{month}.parquet")
+
+
+def partition_months(archive_dir=ARCHIVE_DIR):
+    months = []
+    for path in glob.glob(os.path.join(archive_dir, "repairs_*.parquet")):
+        match = _PARTITION.search(path)
+        if match:
+            months.append(match.group(1))
+    return sorted(months)
+
+
+def sheet_lines(sheet, db_file=ledger.DB_FILE):
+    """Repair lines of one sheet with their vehicle block filled in."""
+    df = ledger.read_sheet(sheet, db_file)
+    df[["No.", "Area", "Vehicle ID", "Date"]] = df[["No.", "Area", "Vehicle ID", "Date"]].ffill()
+    df.insert(0, "Sheet", sheet)
+    df["Month"] = sheet_month(sheet)
+    df["Is Total"] = df["Description"] == schema.TOTAL_LABEL
+    return df
+
+
+def _write_partition(month, sheets, archive_dir, db_file):
+    path = partition_path(month, archive_dir)
+    frames = [sheet_lines(sheet, db_file) for sheet in sheets]
+    frames = [frame for frame in frames if not frame.empty]
+    with file_lock(path):
+        if not frames:
+            if os.path.exists(path):
+                os.remove(path)
+            return 0
+        df = pd.concat(frames, ignore_index=True)
+        with atomic_write(path) as tmp_path:
+            df.to_parquet(tmp_path, index=False)
+    return len(df)
+
+
+def sync(archive_dir=ARCHIVE_DIR, db_file=ledger.DB_FILE):
+    """Rewrite the partitions of months whose ledger sheets changed.
+
+    The first sync builds every month. Returns {month: rows written}.
+    """
+    with closing(connect(db_file)) as conn:
+        initialized = conn.execute("SELECT value FROM archive_state WHERE name = 'initialized'").fetchone()
+        dirty = conn.execute("SELECT sheet, version FROM archive_dirty").fetchall()
+        sheets = [sheet for (sheet,) in conn.execute("SELECT DISTINCT sheet FROM repairs")]
+
+    sheets_by_month = {}
+    for sheet in sheets:
+        month = sheet_month(sheet)
+        if month is not None:
+            sheets_by_month.setdefault(month, []).append(sheet)
+
+    if initialized:
+        months = {sheet_month(sheet) for sheet, _ in dirty} - {None}
+    else:
+        months = set(sheets_by_month) | set(partition_months(archive_dir))
+
+    written = {}
+    for month in sorted(months):
+        written[month] = _write_partition(month, sorted(sheets_by_month.get(month, [])), archive_dir, db_file)
+
+    with closing(connect(db_file)) as conn, conn:
+        # Only clear what was read: sheets changed meanwhile stay dirty.
+        conn.executemany("DELETE FROM archive_dirty WHERE sheet = ? AND version = ?", dirty)
+        conn.execute("INSERT OR REPLACE INTO archive_state (name, value) VALUES ('initialized', '1')")
+    return written
+
+
+def load(start=None, end=None, columns=None, area=None, vehicle_id=None, archive_dir=ARCHIVE_DIR):
+    """Repair lines of the months start..end ("YYYY-MM", inclusive).
+
+    Only the partitions in range are opened, and only `columns` are read.
+    """
+    months = [month for month in partition_months(archive_dir)
+              if (start is None or month >= start) and (end is None or month <= end)]
+    filters = []
+    if area is not None:
+        filters.append(("Area", "==", area))
+    if vehicle_id is not None:
+        filters.append(("Vehicle ID", "==", vehicle_id))
+
+    frames = [
+        pd.read_parquet(partition_path(month, archive_dir), columns=columns, filters=filters or None)
+        for month in months
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def rollup(by="vehicle", start=None, end=None, area=None, vehicle_id=None, archive_dir=ARCHIVE_DIR):
+    """Total repair cost per vehicle, area or month over start..end.
+
+    `by` is a key of GROUPINGS or a list of line columns. Returns one row per
+    group with the total cost, the number of repair lines and the number of
+    vehicle visits (entries), sorted by cost.
+    """
+    keys = GROUPINGS.get(by, by) if isinstance(by, str) else list(by)
+    columns = sorted(set(keys) | {"Sheet", "No.", "Cost (ugx)", "Is Total"})
+    lines = load(start, end, columns=columns, area=area, vehicle_id=vehicle_id, archive_dir=archive_dir)
+    result_columns = keys + ["Total Cost (ugx)", "Repair Lines", "Visits"]
+    if lines.empty:
+        return pd.DataFrame(columns=result_columns)
+
+    lines = lines[~lines["Is Total"]]
+    visits = lines["Sheet"].astype(str) + "#" + lines["No."].astype(str)
+    result = lines.assign(Visit=visits).groupby(keys, dropna=False).agg(**{
+        "Total Cost (ugx)": ("Cost (ugx)", "sum"),
+        "Repair Lines": ("Cost (ugx)", "size"),
+        "Visits": ("Visit", "nunique"),
+    })
+    return result.reset_index().sort_values("Total Cost (ugx)", ascending=False, ignore_index=True)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="archive.py", description="Month-partitioned repair archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("sync", help="refresh the partitions of changed months")
+    report = commands.add_parser("rollup", help="cost rollup across months")
+    report.add_argument("by", choices=sorted(GROUPINGS))
+    report.add_argument("--from", dest="start", help="first month, YYYY-MM")
+    report.add_argument("--to", dest="end", help="last month, YYYY-MM")
+    report.add_argument("--area")
+    report.add_argument("--vehicle")
+    args = parser.parse_args(argv[1:])
+
+    ledger.ensure_ledger()
+    written = sync()
+    if args.command == "sync":
+        for month, rows in written.items():
+            print(f"{month}: {rows} rows")
+        return 0
+    print(rollup(args.by, args.start, args.end, area=args.area, vehicle_id=args.vehicle).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,81 @@
+"""Microbenchmark: amount words and cost formatting for the memo.
+
+    python benchmarks/bench_amounts.py [memos]
+
+Simulates the subject lines of `memos` memos (1,000 by default, e.g. a
+batch back-fill over months and garages) whose totals and vehicle counts
+repeat, and times num2words called directly against the cached
+amounts.words(). It also times per-cell f"{cost:,}" formatting of a month's
+cost column against amounts.format_costs(), and the import of num2words,
+which amounts defers until the first words() call.
+"""
+import os
+import random
+import subprocess
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import amounts  # noqa: E402
+from bench_memo_rows import best_of  # noqa: E402
+
+
+def subject_numbers(memos, seed=0):
+    rng = random.Random(seed)
+    # Month totals of a fleet recur (the same garage, the same service plan).
+    totals = [rng.randrange(1_000_000, 40_000_000, 500) for _ in range(max(1, memos // 4))]
+    return [(rng.choice(totals), rng.randint(20, 120)) for _ in range(memos)]
+
+
+def direct_words(numbers):
+    from num2words import num2words
+
+    return [(num2words(int(total), lang="en").upper(), num2words(vehicles, lang="en").upper())
+            for total, vehicles in numbers]
+
+
+def cached_words(numbers):
+    return [(amounts.words(total), amounts.words(vehicles)) for total, vehicles in numbers]
+
+
+def per_cell(costs):
+    return [f"{int(cost):,}" if pd.notna(cost) else "" for cost in costs]
+
+
+def import_seconds(module):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+
+def main(argv):
+    memos = int(argv[1]) if len(argv) > 1 else 1000
+    numbers = subject_numbers(memos)
+    assert direct_words(numbers) == cached_words(numbers)
+
+    direct = best_of(direct_words, numbers, repeat=3)
+    amounts._words.cache_clear()
+    cold = best_of(cached_words, numbers, repeat=1)
+    warm = best_of(cached_words, numbers, repeat=3)
+
+    rng = random.Random(1)
+    costs = pd.Series([rng.randrange(5_000, 250_000, 500) if rng.random() > 0.2 else None
+                       for _ in range(5000)], dtype="Int64")
+    assert per_cell(costs) == amounts.format_costs(costs).tolist()
+    cells = best_of(per_cell, costs, repeat=3)
+    column = best_of(amounts.format_costs, costs, repeat=3)
+
+    print(f"{memos} memo subjects")
+    print(f"num2words:        {direct * 1000:10.1f} ms")
+    print(f"words, cold:      {cold * 1000:10.1f} ms")
+    print(f"words, warm:      {warm * 1000:10.1f} ms")
+    print(f"{len(costs)} cost cells")
+    print(f"per-cell f-string:{cells * 1000:10.1f} ms")
+    print(f"format_costs:     {column * 1000:10.1f} ms")
+    print(f"import num2words: {import_seconds('num2words') * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,83 @@
+"""Benchmark: memo table preparation, per-cell .iloc loops vs memo_rows.
+
+    python benchmarks/bench_memo_rows.py [lines]
+
+Builds a synthetic month of `lines` repair lines (5,000 by default) in the
+ledger.read_sheet layout and times the loops generate_request used to run
+against the columnar memo_rows pipeline.
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memo_rows  # noqa: E402
+import schema  # noqa: E402
+from fleet import synthetic_month  # noqa: E402
+
+
+def legacy_rows(monthly_repairs_df):
+    monthly_repairs_df = monthly_repairs_df.copy()
+    monthly_repairs_df["Cost (ugx)"] = monthly_repairs_df["Cost (ugx)"].replace({',': ''}, regex=True).astype(int)
+    table_with_vehicle_details = monthly_repairs_df[monthly_repairs_df["Vehicle ID"].notna() & (monthly_repairs_df["Vehicle ID"] != "")]
+    table_with_total_cost = monthly_repairs_df[monthly_repairs_df["Description"] == "Total Cost (ugx)"]
+
+    summary_list = []
+    for i in range(len(table_with_vehicle_details)):
+        summary_list.append({
+            "No.": int(table_with_vehicle_details.iloc[i]["No."]),
+            "Area": table_with_vehicle_details.iloc[i]["Area"],
+            "Vehicle ID": table_with_vehicle_details.iloc[i]["Vehicle ID"],
+            "Date": pd.to_datetime(table_with_vehicle_details.iloc[i]["Date"]).strftime("%d, %b, %Y"),
+            "Total Cost (ugx)": f"{int(table_with_total_cost.iloc[i]['Cost (ugx)']):,}" if not table_with_total_cost.empty else ""
+        })
+
+    detailed_list = []
+    for i in range(len(monthly_repairs_df)):
+        detailed_list.append({
+            "No.": int(monthly_repairs_df.iloc[i]["No."]) if pd.notna(monthly_repairs_df.iloc[i]["No."]) else "",
+            "Area": monthly_repairs_df.iloc[i]["Area"] if pd.notna(monthly_repairs_df.iloc[i]["Area"]) else "",
+            "Vehicle ID": monthly_repairs_df.iloc[i]["Vehicle ID"] if pd.notna(monthly_repairs_df.iloc[i]["Vehicle ID"]) else "",
+            "Date": pd.to_datetime(monthly_repairs_df.iloc[i]["Date"]).strftime("%d, %b, %Y") if pd.notna(monthly_repairs_df.iloc[i]["Date"]) and monthly_repairs_df.iloc[i]["Date"] != "" else "",
+            "Description": monthly_repairs_df.iloc[i]["Description"] if pd.notna(monthly_repairs_df.iloc[i]["Description"]) else "",
+            "Cost (ugx)": f"{int(monthly_repairs_df.iloc[i]['Cost (ugx)']):,}" if pd.notna(monthly_repairs_df.iloc[i]['Cost (ugx)']) and monthly_repairs_df.iloc[i]['Cost (ugx)'] != "" else ""
+        })
+    return summary_list, detailed_list
+
+
+def columnar_rows(monthly_repairs_df):
+    df = schema.coerce_repairs(monthly_repairs_df)
+    return memo_rows.summary_rows(df), memo_rows.detailed_rows(df)
+
+
+def best_of(func, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    lines = int(argv[1]) if len(argv) > 1 else 5000
+    df = synthetic_month(lines)
+
+    legacy_summary, legacy_detailed = legacy_rows(df)
+    summary, detailed = columnar_rows(df)
+    assert [tuple(str(v) for v in row.values()) for row in legacy_detailed] == [tuple(map(str, row)) for row in detailed]
+    assert [tuple(str(v) for v in row.values()) for row in legacy_summary] == [tuple(map(str, row)) for row in summary[:-1]]
+
+    legacy = best_of(legacy_rows, df, repeat=1)
+    columnar = best_of(columnar_rows, df, repeat=5)
+    print(f"{len(df)} sheet rows")
+    print(f"iloc loops: {legacy * 1000:10.1f} ms")
+    print(f"columnar:   {columnar * 1000:10.1f} ms")
+    print(f"speedup:    {legacy / columnar:10.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,177 @@
+"""Benchmark suite: the repair pipeline end to end on a synthetic fleet.
+
+    python benchmarks/bench_pipeline.py [--areas N] [--vehicles M] [--lines K]
+                                        [--years Y] [--seed S] [--output results.json]
+                                        [--baseline previous.json] [--max-regression 0.2]
+                                        [--no-memory]
+
+Runs in a scratch directory (the app's static/ paths are relative) and times
+each stage on a fleet of M vehicles in N areas with K repair lines a month:
+
+  backfill                Y years of monthly sheets into the ledger and history
+  submit                  this month's entries, one vehicle at a time
+  export                  the repairs workbook, every sheet
+  generate_request        the fund request memo for this month
+  update_vehicle_records  grouping, dedup and the vehicle index
+  export_history          the repair history workbook, every record
+
+Peak memory per stage is measured with tracemalloc in a second, separate run
+so it does not distort the timings (--no-memory skips it). Results are
+written as JSON; with --baseline, any stage whose throughput (lines/s) fell
+more than --max-regression below the baseline fails the run (exit status 1).
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store  # noqa: E402
+import ledger  # noqa: E402
+import pipeline  # noqa: E402
+from fleet import Fleet  # noqa: E402
+
+
+@contextmanager
+def _scratch_dir():
+    cwd = os.getcwd()
+    path = tempfile.mkdtemp(prefix="repair-bench-")
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class _Stages:
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.results = {}
+
+    @contextmanager
+    def stage(self, name, lines):
+        if self.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            result = {"seconds": seconds, "lines": lines}
+            if self.trace_memory:
+                result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.results[name] = result
+
+
+def run_stages(fleet, trace_memory=False):
+    """Run every stage in a fresh scratch directory; returns {stage: measurements}."""
+    stages = _Stages(trace_memory)
+    # Measure the writes, not the batching window that waits for other sessions.
+    window, ledger._append_batcher.window = ledger._append_batcher.window, 0
+    try:
+        with _scratch_dir():
+            months = fleet.months()
+            with stages.stage("backfill", fleet.lines * len(months)):
+                for year, month in months:
+                    sheet = fleet.sheet_name(year, month)
+                    ledger.append_rows(sheet, fleet.month_rows(year, month))
+                    history_store.upsert(history_store.group_vehicle_repairs(ledger.read_sheet(sheet)))
+
+            sheet = pipeline.today_sheet()
+            today = datetime.date.today()
+            with stages.stage("submit", fleet.lines):
+                for area, vehicle, date, lines in fleet.entries(today.year, today.month):
+                    pipeline.submit_entry(sheet, area, vehicle, date, lines)
+
+            with stages.stage("export", fleet.lines * (len(months) + 1)):
+                pipeline.export_repairs()
+
+            with stages.stage("generate_request", fleet.lines):
+                pipeline.generate_request(sheet)
+
+            with stages.stage("update_vehicle_records", fleet.lines):
+                pipeline.update_vehicle_records(sheet)
+
+            with stages.stage("export_history", fleet.lines * (len(months) + 1)):
+                pipeline.export_history()
+    finally:
+        ledger._append_batcher.window = window
+    return stages.results
+
+
+def regressions(stages, baseline, max_regression):
+    """Messages for stages whose lines/s fell more than max_regression below the baseline."""
+    failures = []
+    for name, result in stages.items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous:
+            continue
+        floor = previous["lines_per_second"] * (1 - max_regression)
+        if result["lines_per_second"] < floor:
+            failures.append(
+                f"{name}: {result['lines_per_second']:,.0f} lines/s, "
+                f"baseline {previous['lines_per_second']:,.0f} (floor {floor:,.0f})"
+            )
+    return failures
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="bench_pipeline.py", description=__doc__.splitlines()[0])
+    parser.add_argument("--areas", type=int, default=16)
+    parser.add_argument("--vehicles", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=500, help="repair lines per month")
+    parser.add_argument("--years", type=int, default=1, help="years of history")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed throughput drop against the baseline (0.2 = 20%%)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    args = parser.parse_args(argv[1:])
+
+    fleet = Fleet(args.areas, args.vehicles, args.lines, args.years, args.seed)
+    stages = run_stages(fleet)
+    if not args.no_memory:
+        for name, result in run_stages(fleet, trace_memory=True).items():
+            stages[name]["peak_bytes"] = result["peak_bytes"]
+    for result in stages.values():
+        result["lines_per_second"] = result["lines"] / result["seconds"] if result["seconds"] else 0.0
+
+    print(f"{'stage':<24}{'lines':>10}{'ms':>12}{'lines/s':>12}{'peak MB':>10}")
+    for name, result in stages.items():
+        peak = f"{result['peak_bytes'] / 2**20:10.1f}" if "peak_bytes" in result else f"{'-':>10}"
+        print(f"{name:<24}{result['lines']:>10,}{result['seconds'] * 1000:>12.1f}{result['lines_per_second']:>12,.0f}{peak}")
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": fleet.params,
+        "stages": stages,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            failures = regressions(stages, json.load(f), args.max_regression)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if failures:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
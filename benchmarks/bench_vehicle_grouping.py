@@ -0,0 +1,70 @@
+"""Regression benchmark: update_vehicle_records grouping.
+
+    python benchmarks/bench_vehicle_grouping.py [lines] [--max-ms N]
+
+Groups a synthetic year of repair lines (60,000 by default) with the old
+per-group Python loop and with history_store.group_vehicle_repairs, checks
+both give the same records, and exits non-zero if the vectorized version is
+slower than --max-ms (250 ms by default).
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history_store  # noqa: E402
+import schema  # noqa: E402
+from bench_memo_rows import best_of  # noqa: E402
+from fleet import synthetic_month  # noqa: E402
+
+
+def legacy_grouping(monthly_repairs_df):
+    monthly_repairs_df = monthly_repairs_df[monthly_repairs_df["Description"] != "Total Cost (ugx)"].copy()
+    monthly_repairs_df["No."] = monthly_repairs_df["No."].ffill()
+    monthly_repairs_df["Area"] = monthly_repairs_df["Area"].ffill()
+    monthly_repairs_df["Vehicle ID"] = monthly_repairs_df["Vehicle ID"].ffill()
+    monthly_repairs_df["Date"] = monthly_repairs_df["Date"].ffill()
+
+    repair_data = []
+    for group_key, group in monthly_repairs_df.groupby(["No."]):
+        descriptions = ", ".join(group["Description"].dropna().astype(str).tolist())
+        total_cost = group["Cost (ugx)"].replace({',': ''}, regex=True).astype(int).sum()
+        repair_data.append({
+            "Area": group["Area"].iloc[0],
+            "Vehicle ID": group["Vehicle ID"].iloc[0],
+            "Date": pd.to_datetime(group["Date"].iloc[0]).strftime("%d-%b-%Y"),
+            "Descriptions": descriptions,
+            "Total Cost (ugx)": f"{total_cost:,}"
+        })
+    return pd.DataFrame(repair_data)
+
+
+def main(argv):
+    max_ms = 250.0
+    if "--max-ms" in argv:
+        pos = argv.index("--max-ms")
+        max_ms = float(argv[pos + 1])
+        argv = argv[:pos] + argv[pos + 2:]
+    lines = int(argv[1]) if len(argv) > 1 else 60000
+    df = synthetic_month(lines)
+
+    expected = legacy_grouping(df)
+    grouped = history_store.group_vehicle_repairs(df)
+    pd.testing.assert_frame_equal(schema.coerce_history(expected), grouped)
+
+    legacy = best_of(legacy_grouping, df, repeat=1)
+    vectorized = best_of(history_store.group_vehicle_repairs, df, repeat=5)
+    print(f"{len(df)} sheet rows, {len(grouped)} vehicles")
+    print(f"group loop: {legacy * 1000:10.1f} ms")
+    print(f"groupby:    {vectorized * 1000:10.1f} ms")
+    print(f"speedup:    {legacy / vectorized:10.1f}x")
+    if vectorized * 1000 > max_ms:
+        print(f"FAIL: grouping took longer than {max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,96 @@
+"""Synthetic repair data for the benchmarks.
+
+Fleet generates a deterministic fleet of `areas` areas and `vehicles`
+vehicles with `lines` repair lines per month over `years` years, as the
+entry form would submit them (see pipeline.build_entry). synthetic_month()
+builds one month in the pre-ledger text layout ("12,000" costs and
+"%d-%b-%Y" dates) for the benchmarks that compare against the old code.
+"""
+import datetime
+import os
+import random
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pipeline  # noqa: E402
+
+REPAIRS = (
+    "Brake pads", "Chain and sprocket", "Engine oil", "Air filter", "Spark plug",
+    "Front tyre", "Rear tyre", "Clutch cable", "Headlamp bulb", "Carburettor service",
+    "Battery", "Wheel bearings", "Fork seals", "Gear lever", "Mirror",
+)
+
+
+class Fleet:
+    def __init__(self, areas=16, vehicles=200, lines=500, years=1, seed=0):
+        self.areas = [f"Area {i + 1:02d}" for i in range(areas)]
+        self.vehicles = {f"UG {i + 1:04d}X": self.areas[i % areas] for i in range(vehicles)}
+        self.lines = lines
+        self.years = years
+        self.seed = seed
+
+    @property
+    def params(self):
+        return {
+            "areas": len(self.areas),
+            "vehicles": len(self.vehicles),
+            "lines": self.lines,
+            "years": self.years,
+            "seed": self.seed,
+        }
+
+    def months(self, end=None):
+        """The (year, month) of every month of history, oldest first, ending before `end`."""
+        end = end or datetime.date.today().replace(day=1)
+        year, month = end.year, end.month
+        months = []
+        for _ in range(self.years * 12):
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+            months.append((year, month))
+        return months[::-1]
+
+    @staticmethod
+    def sheet_name(year, month):
+        """Sheets are submitted on the 5th of the month after the repairs."""
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+        return f"05-{month:02d}-{year}"
+
+    def entries(self, year, month):
+        """Yield (area, vehicle, date, [(description, cost), ...]) until the month has `lines` lines."""
+        rng = random.Random(f"{self.seed}-{year}-{month}")
+        vehicles = list(self.vehicles)
+        remaining = self.lines
+        while remaining > 0:
+            vehicle = rng.choice(vehicles)
+            count = min(remaining, rng.randint(1, 6))
+            lines = [(rng.choice(REPAIRS), rng.randrange(5_000, 250_000, 500)) for _ in range(count)]
+            date = datetime.date(year, month, rng.randint(1, 28))
+            remaining -= count
+            yield self.vehicles[vehicle], vehicle, date, lines
+
+    def month_rows(self, year, month):
+        """All of one month's ledger rows, one vehicle block per entry."""
+        rows = []
+        for area, vehicle, date, lines in self.entries(year, month):
+            rows.extend(pipeline.build_entry(area, vehicle, date, lines))
+        return rows
+
+
+def synthetic_month(lines, seed=0):
+    rng = random.Random(seed)
+    records = []
+    no = 0
+    while len(records) < lines:
+        no += 1
+        block = rng.randint(1, 6)
+        costs = [rng.randrange(5_000, 250_000, 500) for _ in range(block)]
+        for i, cost in enumerate(costs):
+            if i == 0:
+                records.append([no, f"Area {rng.randint(1, 16)}", f"UG {no:04d}X", f"{rng.randint(1, 28):02d}-Sep-2026", f"Repair {i}", f"{cost:,}"])
+            else:
+                records.append([None, None, None, None, f"Repair {i}", f"{cost:,}"])
+        records.append([None, None, None, None, "Total Cost (ugx)", f"{sum(costs):,}"])
+    return pd.DataFrame.from_records(records, columns=["No.", "Area", "Vehicle ID", "Date", "Description", "Cost (ugx)"])
@@ -0,0 +1,122 @@
+"""Command line for the repair workflow; runs without Streamlit.
+
+    python cli.py submit --area AREA --vehicle VEHICLE [--date YYYY-MM-DD]
+                         --line DESCRIPTION COST [--line DESCRIPTION COST ...]
+    python cli.py generate-request [--sheet DD-MM-YYYY] [--force]
+    python cli.py generate-requests [SHEET ...] [--all] [--workers N] [--garages garages.json] [--force]
+    python cli.py update-history [--sheet DD-MM-YYYY]
+    python cli.py export [--path WORKBOOK.xlsx]
+    python cli.py export-history [--path WORKBOOK.xlsx]
+
+--sheet defaults to today's sheet, so a scheduled month-end run is just
+`generate-request` followed by `update-history`. generate-requests
+regenerates many months at once (e.g. to back-fill or reissue memos), one
+per sheet and garage; garages.json holds a list of memo field overrides.
+update-history only updates the history store; export-history writes the
+repair history workbook from it.
+"""
+import argparse
+import datetime
+import json
+import sys
+
+import history_store
+import ledger
+import pipeline
+import schema
+
+
+def _progress(fraction, message):
+    print(f"[{fraction:4.0%}] {message}", file=sys.stderr)
+
+
+def _cost(text):
+    try:
+        return schema.cost_value(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid cost: {text!r}")
+
+
+def _date(text):
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date (expected YYYY-MM-DD): {text!r}")
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Fleet repair workflow")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="record one vehicle's repairs")
+    submit.add_argument("--sheet", default=pipeline.today_sheet(), help="ledger sheet, DD-MM-YYYY (default today)")
+    submit.add_argument("--area", required=True)
+    submit.add_argument("--vehicle", required=True)
+    submit.add_argument("--date", type=_date, default=pipeline.default_repair_date(),
+                        help="date of repair, YYYY-MM-DD (default first day of last month)")
+    submit.add_argument("--line", nargs=2, action="append", required=True, metavar=("DESCRIPTION", "COST"),
+                        help="one repair line; repeat for each line")
+
+    generate = commands.add_parser("generate-request", help="render the fund request memo")
+    generate.add_argument("--sheet", default=pipeline.today_sheet(), help="ledger sheet, DD-MM-YYYY (default today)")
+    generate.add_argument("--force", action="store_true", help="render even if the entries did not change")
+
+    history = commands.add_parser("update-history", help="add the sheet's vehicles to the repair history")
+    history.add_argument("--sheet", default=pipeline.today_sheet(), help="ledger sheet, DD-MM-YYYY (default today)")
+
+    batch = commands.add_parser("generate-requests", help="render the memos of many sheets in parallel")
+    batch.add_argument("sheets", nargs="*", metavar="SHEET", help="ledger sheets, DD-MM-YYYY")
+    batch.add_argument("--all", action="store_true", help="every sheet in the ledger")
+    batch.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    batch.add_argument("--garages", help="JSON file with a list of memo field overrides, one memo per garage")
+    batch.add_argument("--force", action="store_true", help="render even if the entries did not change")
+
+    export = commands.add_parser("export", help="write the repairs workbook from the ledger")
+    export.add_argument("--path", default=ledger.REPAIRS_FILE)
+
+    export_history = commands.add_parser("export-history", help="write the repair history workbook")
+    export_history.add_argument("--path", default=history_store.HISTORY_FILE)
+    return parser
+
+
+def main(argv):
+    parser = _parser()
+    args = parser.parse_args(argv[1:])
+
+    if args.command == "submit":
+        try:
+            lines = [(description, _cost(cost)) for description, cost in args.line]
+        except argparse.ArgumentTypeError as exc:
+            parser.error(str(exc))
+        result = pipeline.submit_entry(args.sheet, args.area, args.vehicle, args.date, lines)
+        print(f"Recorded {result['lines']} lines ({result['total_cost']:,} ugx) in sheet {result['sheet']}")
+    elif args.command == "generate-request":
+        result = pipeline.generate_request(args.sheet, progress=_progress, force=args.force)
+        print(result["path"])
+    elif args.command == "generate-requests":
+        sheets = ledger.sheet_names() if args.all else args.sheets
+        if not sheets:
+            parser.error("give one or more sheets, or --all")
+        garages = None
+        if args.garages:
+            with open(args.garages, encoding="utf-8") as f:
+                garages = json.load(f)
+        results = pipeline.generate_requests(sheets, garages, workers=args.workers, force=args.force, progress=_progress)
+        for result in results:
+            if "error" in result:
+                print(f"{result['sheet']}: FAILED {result['error']}")
+            else:
+                print(f"{result['sheet']}: {result['path']}{' (unchanged)' if result['cached'] else ''}")
+        return 1 if any("error" in result for result in results) else 0
+    elif args.command == "update-history":
+        result = pipeline.update_vehicle_records(args.sheet, progress=_progress)
+        print(f"{result['added']} new of {result['vehicles']} vehicle record(s)")
+    elif args.command == "export-history":
+        print(pipeline.export_history(args.path))
+    else:
+        print(pipeline.export_repairs(args.path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,119 @@
+"""Formatting stage for the workbooks the app writes.
+
+Frames are written and styled in the same pass: column widths are computed
+from the DataFrame before writing, and the cells just written get one of the
+shared named styles instead of fresh Alignment/Border objects per cell, so
+there is no reload/restyle/save round trip over the whole sheet.
+
+Cost and date columns get their own named styles carrying the number formats
+from schema.EXCEL_FORMATS, so thousands separators and day-month-year dates
+are applied by Excel to typed cells.
+"""
+import os
+
+import pandas as pd
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.utils import get_column_letter
+
+import instrumentation
+import schema
+
+CELL_STYLE = "repair_cell"
+HEADER_STYLE = "repair_header"
+COST_STYLE = "repair_cost"
+DATE_STYLE = "repair_date"
+
+_FORMAT_STYLES = {
+    schema.EXCEL_COST_FORMAT: COST_STYLE,
+    schema.EXCEL_DATE_FORMAT: DATE_STYLE,
+}
+
+# Rendered length of a date under schema.EXCEL_DATE_FORMAT ("01-Sep-2026").
+_DATE_LENGTH = 11
+
+MIN_WIDTH = 15
+MAX_WIDTH = 60
+
+_styles = {}
+
+
+def _named_styles():
+    if not _styles:
+        thin = Side(style='thin')
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+        alignment = Alignment(wrap_text=True, vertical="top")
+        _styles[CELL_STYLE] = NamedStyle(name=CELL_STYLE, border=border, alignment=alignment)
+        _styles[HEADER_STYLE] = NamedStyle(name=HEADER_STYLE, border=border, alignment=alignment, font=Font(bold=True))
+        for number_format, name in _FORMAT_STYLES.items():
+            _styles[name] = NamedStyle(name=name, border=border, alignment=alignment, number_format=number_format)
+    return _styles
+
+
+def register_styles(workbook):
+    for name, style in _named_styles().items():
+        if name not in workbook.named_styles:
+            workbook.add_named_style(style)
+
+
+def column_styles(columns):
+    """Named style of the data cells of each column."""
+    return [_FORMAT_STYLES.get(schema.EXCEL_FORMATS.get(column), CELL_STYLE) for column in columns]
+
+
+def _rendered_length(values):
+    present = values.dropna()
+    if present.empty:
+        return 0
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return _DATE_LENGTH
+    if pd.api.types.is_integer_dtype(values):
+        # Widest value with its thousands separators
+        return max(len(f"{int(present.max()):,}"), len(f"{int(present.min()):,}"))
+    return int(present.astype(str).str.len().max())
+
+
+def content_lengths(df):
+    """Longest rendered value per column of `df`, header included."""
+    return [max(_rendered_length(df[column]), len(str(column))) for column in df.columns]
+
+
+def column_widths(lengths):
+    return [max(MIN_WIDTH, min(length + 3, MAX_WIDTH)) for length in lengths]
+
+
+def _style_rows(ws, first_row, last_row, styles, header_row=None):
+    for row in ws.iter_rows(min_row=first_row, max_row=last_row, max_col=len(styles)):
+        if row and row[0].row == header_row:
+            for cell in row:
+                cell.style = HEADER_STYLE
+            continue
+        for cell, style in zip(row, styles):
+            cell.style = style
+
+
+def _set_widths(ws, widths):
+    for idx, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+
+
+def write_frame(writer, df, sheet_name):
+    """Write `df` as `sheet_name` through an openpyxl ExcelWriter and style it."""
+    with instrumentation.stage("excel.write_frame") as stage:
+        df.to_excel(writer, index=False, sheet_name=sheet_name)
+        ws = writer.sheets[sheet_name]
+        register_styles(ws.parent)
+        _style_rows(ws, 1, len(df) + 1, column_styles(df.columns), header_row=1)
+        _set_widths(ws, column_widths(content_lengths(df)))
+        stage.add(rows=len(df))
+    return ws
+
+
+def save_frame(path, df, sheet_name="Sheet1"):
+    """Write `df` as the only sheet of a new workbook at `path`."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with instrumentation.stage("excel.save_frame") as stage:
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            write_frame(writer, df, sheet_name)
+        stage.add(rows=len(df), bytes_written=instrumentation.file_size(path))
+    return path
+
@@ -0,0 +1,226 @@
+"""Indexed store for the vehicle repair history.
+
+History records live in the `history` table of the ledger database, keyed by a
+content hash of (Area, Vehicle ID, Date, Descriptions, Total Cost). Upserts are
+idempotent and only insert records whose key is new, so updating the history
+no longer re-reads and de-duplicates the whole history file. The Excel file
+static/repair_history.xlsx is only written on demand, by export_history()
+(the app's export button or `python cli.py export-history`); it rewrites the
+whole workbook, unless nothing changed since the previous export.
+"""
+import hashlib
+import os
+from contextlib import closing
+
+import pandas as pd
+
+import excel_format
+import instrumentation
+import ledger
+import schema
+from write_coordinator import atomic_write, file_lock
+
+HISTORY_FILE = os.path.join("static", "repair_history.xlsx")
+
+COLUMNS = schema.HISTORY_COLUMNS
+_FIELDS = ["area", "vehicle_id", "date", "descriptions", "total_cost"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    area TEXT,
+    vehicle_id TEXT,
+    date TEXT,
+    descriptions TEXT,
+    total_cost INTEGER
+);
+CREATE TABLE IF NOT EXISTS history_exports (
+    path TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def connect(db_file=ledger.DB_FILE):
+    conn = ledger.connect(db_file)
+    conn.executescript(_SCHEMA)
+    ledger.apply_migration(conn, "history_typed_costs_and_dates", _migrate_typed_history)
+    return conn
+
+
+def _migrate_typed_history(conn):
+    # Re-key and re-store records written with "12,000" costs and "%d-%b-%Y"
+    # dates. Records that become identical once typed are merged.
+    rows = conn.execute(f"SELECT id, {', '.join(_FIELDS)} FROM history ORDER BY id").fetchall()
+    conn.execute("DELETE FROM history")
+    conn.executemany(
+        f"INSERT OR IGNORE INTO history (id, key, {', '.join(_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(row_id, *_record(values)) for row_id, *values in rows],
+    )
+    # Exported workbooks predate the typed columns; rebuild them on next export.
+    conn.execute("DELETE FROM history_exports")
+
+
+def _text(value):
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value).strip()
+
+
+def _typed(convert, value):
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return ledger.clean_value(value)
+
+
+def _record(values):
+    """(key, *stored values) for one record given in COLUMNS order."""
+    area, vehicle_id, date, descriptions, total_cost = values
+    stored = (
+        ledger.clean_value(area),
+        ledger.clean_value(vehicle_id),
+        _typed(schema.date_value, date),
+        ledger.clean_value(descriptions),
+        _typed(schema.cost_value, total_cost),
+    )
+    return (record_key(*stored), *stored)
+
+
+def record_key(area, vehicle_id, date, descriptions, total_cost):
+    """Content hash identifying one history record.
+
+    Dates and costs are hashed in their typed form, so "01-Sep-2026" and
+    2026-09-01, or "12,000" and 12000, give the same key.
+    """
+    parts = [
+        _text(area),
+        _text(vehicle_id),
+        _text(_typed(schema.date_value, date)),
+        _text(descriptions),
+        _text(_typed(schema.cost_value, total_cost)),
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def group_vehicle_repairs(df):
+    """Collapse a month's sheet into one history record per vehicle block.
+
+    A block starts at each row with a Vehicle ID, whatever its "No." says
+    (numbers can repeat or be missing after edits). The "Total Cost (ugx)"
+    rows are dropped and the block columns taken from the block's first
+    non-empty value; typed costs are summed per block with a single
+    groupby().agg().
+    """
+    df = schema.coerce_repairs(df)
+    block = df["Vehicle ID"].notna().cumsum()
+    in_block = (block > 0) & (df["Description"] != schema.TOTAL_LABEL)
+    lines = df.loc[in_block, ["Area", "Vehicle ID", "Date", "Description"]].assign(
+        Block=block[in_block],
+        Cost=df.loc[in_block, "Cost (ugx)"],
+    )
+
+    grouped = lines.groupby("Block", sort=True).agg(
+        Area=("Area", "first"),
+        VehicleID=("Vehicle ID", "first"),
+        Date=("Date", "first"),
+        Cost=("Cost", "sum"),
+    )
+    # Concatenate "desc, " strings per block with one groupby().sum() and
+    # trim the trailing separator, instead of a Python join per group.
+    descriptions = lines["Description"].dropna().astype(str)
+    descriptions = (descriptions + ", ").groupby(lines["Block"]).sum().str[:-2]
+
+    return schema.coerce_history(pd.DataFrame({
+        "Area": grouped["Area"].to_numpy(),
+        "Vehicle ID": grouped["VehicleID"].to_numpy(),
+        "Date": grouped["Date"].to_numpy(),
+        "Descriptions": descriptions.reindex(grouped.index, fill_value="").to_numpy(),
+        "Total Cost (ugx)": grouped["Cost"].array,
+    }))
+
+
+def upsert(df, db_file=ledger.DB_FILE):
+    """Insert the records of `df` that are not in the store yet.
+
+    Returns the number of records actually added.
+    """
+    records = [_record(row) for row in df.reindex(columns=COLUMNS).itertuples(index=False, name=None)]
+    with instrumentation.stage("history.upsert") as stage, closing(connect(db_file)) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(
+            f"INSERT OR IGNORE INTO history (key, {', '.join(_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            records,
+        )
+        stage.add(rows=conn.total_changes - before)
+        return conn.total_changes - before
+
+
+def read_history(after_id=0, db_file=ledger.DB_FILE):
+    """Return (records added after `after_id` as a DataFrame, highest id)."""
+    with closing(connect(db_file)) as conn:
+        rows = conn.execute(
+            f"SELECT id, {', '.join(_FIELDS)} FROM history WHERE id > ? ORDER BY id",
+            (after_id,),
+        ).fetchall()
+    last_id = rows[-1][0] if rows else after_id
+    df = pd.DataFrame.from_records([row[1:] for row in rows], columns=COLUMNS)
+    return schema.coerce_history(df), last_id
+
+
+def import_history(path=HISTORY_FILE, db_file=ledger.DB_FILE):
+    """Load an existing repair_history.xlsx into the store (idempotent)."""
+    return upsert(pd.read_excel(path), db_file)
+
+
+def ensure_history(path=HISTORY_FILE, db_file=ledger.DB_FILE):
+    """Seed an empty store from the legacy history workbook, if there is one."""
+    with closing(connect(db_file)) as conn:
+        (count,) = conn.execute("SELECT COUNT(*) FROM history").fetchone()
+    if count == 0 and os.path.exists(path):
+        import_history(path, db_file)
+
+
+def export_history(path=HISTORY_FILE, db_file=ledger.DB_FILE):
+    """Write the whole history store out as the history workbook.
+
+    The store is seeded from the legacy workbook first, and an existing file
+    is never replaced by an empty store. Skipped when the file is still the
+    one written by the previous export and no record was added since.
+    Returns the number of records written.
+    """
+    ensure_history(db_file=db_file)
+    with instrumentation.stage("history.export") as stage, file_lock(path):
+        with closing(connect(db_file)) as conn:
+            state = conn.execute(
+                "SELECT last_id, mtime_ns, size FROM history_exports WHERE path = ?", (path,)
+            ).fetchone()
+            (last_id,) = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history").fetchone()
+
+        if not last_id and os.path.exists(path):
+            return 0
+        if state is not None and state[0] == last_id and os.path.exists(path):
+            stat = os.stat(path)
+            if (stat.st_mtime_ns, stat.st_size) == (state[1], state[2]):
+                return 0
+
+        df, new_last_id = read_history(db_file=db_file)
+        with atomic_write(path) as tmp_path:
+            excel_format.save_frame(tmp_path, df)
+
+        stat = os.stat(path)
+        with closing(connect(db_file)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO history_exports (path, last_id, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                (path, new_last_id, stat.st_mtime_ns, stat.st_size),
+            )
+        stage.add(rows=len(df), bytes_written=stat.st_size)
+        return len(df)
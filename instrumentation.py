@@ -0,0 +1,189 @@
+"""Opt-in timing and I/O instrumentation of the pipeline stages.
+
+    with instrumentation.run("generate_request"):
+        with instrumentation.stage("ledger.read_sheet") as s:
+            df = ...
+            s.add(rows=len(df))
+
+    @instrumentation.timed("memo.render")
+    def render(...): ...
+
+A run groups the stages executed inside it (per thread); a stage outside any
+run is recorded as a run of its own. Each stage records wall time, rows and
+bytes read/written. Finished runs are kept in memory (recent_runs(), shown in
+the app's debug sidebar) and appended as JSON lines to LOG_FILE.
+
+Instrumentation is off unless REPAIR_INSTRUMENT=1 is set or enable() is
+called. While off, run()/stage() return a shared no-op context and timed()
+functions make one flag check, so the stages cost next to nothing.
+"""
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+LOG_FILE = os.path.join("static", "logs", "instrumentation.jsonl")
+HISTORY_SIZE = 50
+
+_enabled = os.environ.get("REPAIR_INSTRUMENT", "") not in ("", "0")
+_local = threading.local()
+_runs = collections.deque(maxlen=HISTORY_SIZE)
+_lock = threading.Lock()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def file_size(path):
+    """Size of `path` in bytes, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class _Null:
+    """What run()/stage() hand out while instrumentation is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add(self, rows=0, bytes_read=0, bytes_written=0):
+        pass
+
+
+_NULL = _Null()
+
+
+class _Stage:
+    __slots__ = ("name", "depth", "rows", "bytes_read", "bytes_written", "seconds", "_start", "_run", "_owns_run")
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    def add(self, rows=0, bytes_read=0, bytes_written=0):
+        self.rows += rows
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+    def __enter__(self):
+        self._run = getattr(_local, "run", None)
+        self._owns_run = self._run is None
+        if self._owns_run:
+            self._run = _Run(self.name).__enter__()
+        self.depth = self._run.depth
+        self._run.depth += 1
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start
+        self._run.depth -= 1
+        self._run.stages.append(self)
+        if self._owns_run:
+            self._run.__exit__(exc_type, exc, tb)
+        return False
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "seconds": self.seconds,
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class _Run:
+    def __init__(self, name):
+        self.name = name
+        self.stages = []
+        self.depth = 0
+        self.nested = False
+
+    def __enter__(self):
+        self.nested = getattr(_local, "run", None) is not None
+        if not self.nested:
+            _local.run = self
+            self.started = time.time()
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.nested:
+            # A run inside a run (e.g. a pipeline step called by another)
+            # simply contributes its stages to the outer one.
+            return False
+        _local.run = None
+        record = {
+            "name": self.name,
+            "started": self.started,
+            "seconds": time.perf_counter() - self._start,
+            # Stages finish innermost first; list them in start order.
+            "stages": [s.as_dict() for s in sorted(self.stages, key=lambda s: s._start)],
+        }
+        if exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        _finish(record)
+        return False
+
+
+def run(name):
+    """Context manager grouping the stages of one pipeline run."""
+    return _Run(name) if _enabled else _NULL
+
+
+def stage(name):
+    """Context manager timing one stage; the yielded object takes add(rows=, bytes_read=, bytes_written=)."""
+    return _Stage(name) if _enabled else _NULL
+
+
+def timed(name=None):
+    """Decorator recording each call of the function as a stage."""
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _finish(record):
+    with _lock:
+        _runs.append(record)
+        try:
+            os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+            with open(LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            # The log is a convenience; never fail the pipeline over it.
+            pass
+
+
+def recent_runs(limit=10):
+    """The last `limit` finished runs of this process, newest first."""
+    with _lock:
+        return list(_runs)[::-1][:limit]
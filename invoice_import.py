@@ -0,0 +1,284 @@
+"""Bulk import of a garage invoice (CSV or XLSX) into the ledger.
+
+The invoice lists one repair per line with Area, Vehicle, Date, Description
+and Cost columns (common header spellings are accepted, see HEADERS). A line
+with a blank Vehicle continues the vehicle above it, and blank Area/Date cells
+repeat the last value seen, so both "one vehicle per line" and "vehicle on the
+first line only" layouts work. Dates must be in one of DATE_FORMATS (day
+first, as garages write them); anything else is reported, never guessed.
+
+The file is read in chunks of CHUNK_ROWS lines and every line is checked
+against the cached reference lists before anything is written. Lines are then
+grouped into the same vehicle blocks the entry form submits (a "Total Cost
+(ugx)" row after each vehicle, "No." numbered by the ledger) and appended in
+a single transaction. An invoice with any invalid line raises InvoiceError
+and writes nothing.
+
+    python invoice_import.py INVOICE.csv|INVOICE.xlsx [--sheet DD-MM-YYYY] [--dry-run]
+"""
+import argparse
+import datetime
+import sys
+
+import openpyxl
+import pandas as pd
+
+import ledger
+import reference_data
+import schema
+
+CHUNK_ROWS = 200
+
+HEADERS = {
+    "Area": ("area",),
+    "Vehicle ID": ("vehicle id", "vehicle", "vehicle no", "vehicle no.", "reg no", "reg no."),
+    "Date": ("date", "date of repair", "repair date"),
+    "Description": ("description", "repair description", "repair", "item", "particulars"),
+    "Cost (ugx)": ("cost (ugx)", "cost", "amount", "amount (ugx)"),
+}
+REQUIRED = ("Vehicle ID", "Description", "Cost (ugx)")
+
+DATE_FORMATS = (schema.ISO_DATE, schema.SHEET_DATE, "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+
+_ALIASES = {alias: column for column, aliases in HEADERS.items() for alias in aliases}
+
+
+class InvoiceError(ValueError):
+    """The invoice cannot be imported; `problems` lists one message per bad line."""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        shown = "; ".join(self.problems[:5])
+        more = f" (and {len(self.problems) - 5} more)" if len(self.problems) > 5 else ""
+        super().__init__(f"{len(self.problems)} problem(s) in invoice: {shown}{more}")
+
+
+def _header_map(columns):
+    mapping = {}
+    for column in columns:
+        canonical = _ALIASES.get(str(column).strip().lower())
+        if canonical is not None and canonical not in mapping.values():
+            mapping[column] = canonical
+    missing = [column for column in REQUIRED if column not in mapping.values()]
+    if missing:
+        raise InvoiceError([f"missing column(s): {', '.join(missing)}"])
+    return mapping
+
+
+def _xlsx_chunks(source, chunk_rows):
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = ["" if cell is None else str(cell) for cell in header]
+        width = len(header)
+        chunk = []
+        for row in rows:
+            chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(chunk) == chunk_rows:
+                yield pd.DataFrame.from_records(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame.from_records(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_chunks(source, name=None, chunk_rows=CHUNK_ROWS):
+    """Yield the invoice lines as DataFrames of at most `chunk_rows` rows.
+
+    `source` is a path or a binary file object; `name` (defaulting to the
+    path or the file object's .name) decides between XLSX and CSV.
+    """
+    name = str(name or getattr(source, "name", source)).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        yield from _xlsx_chunks(source, chunk_rows)
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+
+
+def invoice_date(value):
+    """ISO text of an invoice date cell; raises ValueError unless it is in DATE_FORMATS.
+
+    Unlike schema.date_value there is no free-form fallback: pandas would read
+    02/09/2026 month first.
+    """
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.strftime(schema.ISO_DATE)
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).strftime(schema.ISO_DATE)
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+def _text(value):
+    value = ledger.clean_value(value)
+    if isinstance(value, float) and value.is_integer():
+        # "123" typed into Excel arrives as 123.0
+        value = int(value)
+    return None if value is None else str(value)
+
+
+class _BlockBuilder:
+    """Turns validated invoice lines into ledger rows, one vehicle block at a time."""
+
+    def __init__(self, areas, vehicles):
+        self.areas = frozenset(areas)
+        self.vehicles = frozenset(vehicles)
+        self.rows = []
+        self.problems = []
+        self.lines = 0
+        self.vehicle_count = 0
+        self.total_cost = 0
+        self._area = None
+        self._date = None
+        self._block = None
+        self._block_cost = 0
+        self._invalid_block = False
+
+    def _close_block(self):
+        if self._block is not None:
+            self.rows.append({
+                "No.": "",
+                "Area": "",
+                "Vehicle ID": "",
+                "Date": None,
+                "Description": schema.TOTAL_LABEL,
+                "Cost (ugx)": self._block_cost,
+            })
+            self._block = None
+
+    def add(self, line_no, area, vehicle, date, description, cost):
+        if vehicle is None and description is None and cost is None:
+            return
+        problems = []
+        if area is not None:
+            self._area = area
+        if date is not None:
+            try:
+                self._date = invoice_date(date)
+            except (TypeError, ValueError):
+                problems.append(f"line {line_no}: unreadable date {date!r}")
+        try:
+            cost = schema.cost_value(cost)
+        except (TypeError, ValueError):
+            problems.append(f"line {line_no}: unreadable cost {cost!r}")
+        else:
+            if cost is None:
+                problems.append(f"line {line_no}: missing cost")
+            elif cost < 0:
+                problems.append(f"line {line_no}: negative cost {cost}")
+
+        if vehicle is not None:
+            if self.vehicles and vehicle not in self.vehicles:
+                problems.append(f"line {line_no}: unknown vehicle {vehicle!r}")
+            if self._area is None:
+                problems.append(f"line {line_no}: missing area")
+            elif self.areas and self._area not in self.areas:
+                problems.append(f"line {line_no}: unknown area {self._area!r}")
+            if self._date is None and date is None:
+                problems.append(f"line {line_no}: missing date")
+        elif self._invalid_block:
+            # Already reported with the vehicle's line.
+            return
+        elif self._block is None:
+            problems.append(f"line {line_no}: no vehicle for this line")
+
+        if problems:
+            self.problems.extend(problems)
+            if vehicle is not None:
+                self._close_block()
+                self._invalid_block = True
+            return
+
+        self.lines += 1
+        self.total_cost += cost
+        key = (self._area, vehicle, self._date)
+        if vehicle is None or key == self._block:
+            self.rows.append({
+                "No.": "",
+                "Area": "",
+                "Vehicle ID": "",
+                "Date": None,
+                "Description": description or "",
+                "Cost (ugx)": cost,
+            })
+            self._block_cost += cost
+            return
+
+        self._close_block()
+        self._invalid_block = False
+        self._block = key
+        self._block_cost = cost
+        self.vehicle_count += 1
+        self.rows.append({
+            "No.": "",
+            "Area": self._area,
+            "Vehicle ID": vehicle,
+            "Date": pd.Timestamp(self._date),
+            "Description": description or "",
+            "Cost (ugx)": cost,
+        })
+
+    def finish(self):
+        self._close_block()
+        return self.rows
+
+
+def build_rows(source, name=None, chunk_rows=CHUNK_ROWS):
+    """Validate the invoice and return (ledger rows, summary dict).
+
+    Raises InvoiceError listing every invalid line.
+    """
+    builder = _BlockBuilder(reference_data.load_areas(), reference_data.load_vehicles())
+    line_no = 1  # the header
+    for chunk in read_chunks(source, name, chunk_rows):
+        chunk = chunk.rename(columns=_header_map(chunk.columns)).reindex(columns=list(HEADERS))
+        for area, vehicle, date, description, cost in chunk.itertuples(index=False, name=None):
+            line_no += 1
+            builder.add(line_no, _text(area), _text(vehicle), ledger.clean_value(date), _text(description), ledger.clean_value(cost))
+    if builder.problems:
+        raise InvoiceError(builder.problems)
+    rows = builder.finish()
+    if not rows:
+        raise InvoiceError(["the invoice has no repair lines"])
+    return rows, {"lines": builder.lines, "vehicles": builder.vehicle_count, "total_cost": builder.total_cost}
+
+
+def import_invoice(source, sheet, name=None, db_file=ledger.DB_FILE, dry_run=False):
+    """Append the invoice's repair lines to ledger sheet `sheet` in one transaction."""
+    rows, summary = build_rows(source, name)
+    if not dry_run:
+        ledger.append_rows(sheet, rows, db_file)
+    summary["sheet"] = sheet
+    return summary
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="invoice_import.py", description="Import a garage invoice into the ledger")
+    parser.add_argument("invoice", help="invoice .csv or .xlsx")
+    parser.add_argument("--sheet", default=datetime.date.today().strftime("%d-%m-%Y"),
+                        help="ledger sheet (submission date, DD-MM-YYYY); default today")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    args = parser.parse_args(argv[1:])
+
+    ledger.ensure_ledger()
+    try:
+        summary = import_invoice(args.invoice, args.sheet, dry_run=args.dry_run)
+    except InvoiceError as exc:
+        for problem in exc.problems:
+            print(problem, file=sys.stderr)
+        return 1
+    action = "Checked" if args.dry_run else "Imported"
+    print(f"{action} {summary['lines']} lines for {summary['vehicles']} vehicles "
+          f"({summary['total_cost']:,} ugx) into sheet {summary['sheet']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
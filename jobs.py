@@ -0,0 +1,145 @@
+"""Background execution of the slow month-end steps.
+
+Jobs are recorded in the `jobs` table of the ledger database and run on a
+single worker thread shared by every Streamlit session in the process, so the
+UI stays responsive while a memo renders and two clicks can never write the
+same workbook at the same time. Each job's status, progress and result (JSON)
+survive reruns and restarts; jobs that were still queued or running when the
+process died are marked "interrupted" on startup.
+"""
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import ledger
+import pipeline
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+ACTIVE = (QUEUED, RUNNING)
+
+KINDS = {
+    "generate_request": pipeline.generate_request,
+    "update_vehicle_records": pipeline.update_vehicle_records,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+"""
+
+_FIELDS = ["id", "kind", "params", "status", "progress", "message", "result", "error",
+           "created_at", "started_at", "finished_at"]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def connect(db_file=ledger.DB_FILE):
+    conn = ledger.connect(db_file)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _update(job_id, **fields):
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with closing(connect()) as conn, conn:
+        conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Anything still active belongs to a previous process.
+            with closing(connect()) as conn, conn:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE status IN (?, ?)",
+                    (INTERRUPTED, time.time(), *ACTIVE),
+                )
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="repair-jobs")
+        return _executor
+
+
+def _run(job_id, kind, params):
+    _update(job_id, status=RUNNING, started_at=time.time(), message="Started")
+
+    def progress(fraction, message):
+        _update(job_id, progress=float(fraction), message=message)
+
+    try:
+        result = KINDS[kind](progress=progress, **params)
+    except Exception as exc:
+        _update(
+            job_id,
+            status=FAILED,
+            finished_at=time.time(),
+            message=f"{type(exc).__name__}: {exc}",
+            error=traceback.format_exc(),
+        )
+        return
+    _update(
+        job_id,
+        status=DONE,
+        progress=1.0,
+        finished_at=time.time(),
+        result=json.dumps(result, default=str),
+    )
+
+
+def submit(kind, **params):
+    """Queue a `kind` job with keyword `params`; returns the job id."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    executor = _get_executor()
+    with closing(connect()) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO jobs (kind, params, status, created_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(params), QUEUED, time.time()),
+        )
+        job_id = cursor.lastrowid
+    executor.submit(_run, job_id, kind, params)
+    return job_id
+
+
+def _job(row):
+    job = dict(zip(_FIELDS, row))
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def get(job_id):
+    _get_executor()
+    with closing(connect()) as conn:
+        row = conn.execute(f"SELECT {', '.join(_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def recent(limit=10):
+    """The latest `limit` jobs, newest first."""
+    _get_executor()
+    with closing(connect()) as conn:
+        rows = conn.execute(
+            f"SELECT {', '.join(_FIELDS)} FROM jobs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [_job(row) for row in rows]
+
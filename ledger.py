@@ -0,0 +1,388 @@
+"""Append-only repair ledger backed by SQLite.
+
+The ledger is the system of record for repair entries. Each submission appends
+its rows in one small transaction instead of rewriting a whole sheet of
+repairs_excel.xlsx; the workbook is produced on demand by export_workbook().
+Rows are grouped by "sheet", the submission date (%d-%m-%Y) that used to name
+the worksheet they were written to.
+
+    python ledger.py migrate [static/repairs_excel.xlsx]
+    python ledger.py export [static/repairs_excel.xlsx]
+"""
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import pandas as pd
+
+import excel_format
+import instrumentation
+import schema
+from write_coordinator import WriteBatcher, locked_write
+
+DB_FILE = os.path.join("static", "repairs.db")
+REPAIRS_FILE = os.path.join("static", "repairs_excel.xlsx")
+
+COLUMNS = schema.REPAIR_COLUMNS
+_FIELDS = ["entry_no", "area", "vehicle_id", "date", "description", "cost"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repairs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet TEXT NOT NULL,
+    entry_no INTEGER,
+    area TEXT,
+    vehicle_id TEXT,
+    date TEXT,
+    description TEXT,
+    cost INTEGER
+);
+CREATE INDEX IF NOT EXISTS repairs_sheet ON repairs (sheet, id);
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    name TEXT PRIMARY KEY
+);
+"""
+
+
+def connect(db_file=DB_FILE):
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_file, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    apply_migration(conn, "repairs_typed_costs_and_dates", _migrate_typed_repairs)
+    return conn
+
+
+def apply_migration(conn, name, migrate):
+    """Run `migrate(conn)` once per database, recorded under `name`."""
+    applied = "SELECT 1 FROM schema_migrations WHERE name = ?"
+    if conn.execute(applied, (name,)).fetchone():
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not conn.execute(applied, (name,)).fetchone():
+            migrate(conn)
+            conn.execute("INSERT INTO schema_migrations (name) VALUES (?)", (name,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _convert(convert, value):
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _migrate_typed_repairs(conn):
+    # Ledgers written before the typed schema hold "12,000" costs and
+    # "%d-%b-%Y" dates; store them as INTEGER and ISO text instead.
+    rows = conn.execute("SELECT id, date, cost FROM repairs").fetchall()
+    conn.executemany(
+        "UPDATE repairs SET date = ?, cost = ? WHERE id = ?",
+        [(_convert(schema.date_value, date), _convert(schema.cost_value, cost), row_id) for row_id, date, cost in rows],
+    )
+
+
+def clean_value(value):
+    """Normalise a text/number cell for storage; blank cells become None."""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        # numpy scalars -> plain Python values sqlite3 can bind
+        value = value.item()
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def _record(sheet, row):
+    entry_no = clean_value(row.get("No."))
+    return (
+        sheet,
+        int(entry_no) if entry_no is not None else None,
+        clean_value(row.get("Area")),
+        clean_value(row.get("Vehicle ID")),
+        schema.date_value(row.get("Date")),
+        clean_value(row.get("Description")),
+        schema.cost_value(row.get("Cost (ugx)")),
+    )
+
+
+def _insert(conn, sheet, rows):
+    conn.executemany(
+        f"INSERT INTO repairs (sheet, {', '.join(_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [_record(sheet, row) for row in rows],
+    )
+
+
+def number_entries(rows, start=1):
+    """Number the rows that open a vehicle block ("No."), blanking the rest."""
+    count = start - 1
+    for row in rows:
+        if clean_value(row.get("Vehicle ID")) is not None:
+            count += 1
+            row["No."] = count
+        else:
+            row["No."] = ""
+    return rows
+
+
+def _next_entry_no(conn, sheet):
+    # MAX rather than COUNT: after a block is deleted the count falls below
+    # the highest "No." still in use and would hand it out again.
+    (last,) = conn.execute("SELECT MAX(entry_no) FROM repairs WHERE sheet = ?", (sheet,)).fetchone()
+    return (last or 0) + 1
+
+
+def _append_batch(items):
+    """Commit several (db_file, sheet, rows) submissions, one transaction per database."""
+    by_db = {}
+    for db_file, sheet, rows in items:
+        by_db.setdefault(db_file, []).append((sheet, rows))
+    for db_file, submissions in by_db.items():
+        with closing(connect(db_file)) as conn:
+            # BEGIN IMMEDIATE takes the write lock up front so two sessions
+            # cannot hand out the same "No." for the same sheet.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                with instrumentation.stage("ledger.append") as stage:
+                    for sheet, rows in submissions:
+                        _insert(conn, sheet, number_entries(rows, start=_next_entry_no(conn, sheet)))
+                        stage.add(rows=len(rows))
+                    conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    return [None] * len(items)
+
+
+# Submissions arriving within the window share one transaction.
+_append_batcher = WriteBatcher(_append_batch, window=0.1)
+
+
+def append_rows(sheet, rows, db_file=DB_FILE):
+    """Append one submission's rows to `sheet`, continuing its "No." sequence."""
+    _append_batcher.submit((db_file, sheet, [dict(row) for row in rows]))
+
+
+def replace_sheet(sheet, df, db_file=DB_FILE):
+    """Replace every row of `sheet` with the rows of `df` (e.g. after editing)."""
+    with closing(connect(db_file)) as conn, conn:
+        _replace(conn, sheet, df)
+
+
+def _replace(conn, sheet, df):
+    conn.execute("DELETE FROM repairs WHERE sheet = ?", (sheet,))
+    _insert(conn, sheet, df.reindex(columns=COLUMNS).to_dict("records"))
+
+
+def read_sheet(sheet, db_file=DB_FILE):
+    """Return the rows of `sheet` as a typed frame (schema.coerce_repairs).
+
+    Empty cells come back as missing values, as pd.read_excel gave for the
+    worksheet, so callers can keep using notna()/ffill().
+    """
+    with instrumentation.stage("ledger.read_sheet") as stage, closing(connect(db_file)) as conn:
+        records = conn.execute(
+            f"SELECT {', '.join(_FIELDS)} FROM repairs WHERE sheet = ? ORDER BY id",
+            (sheet,),
+        ).fetchall()
+        stage.add(rows=len(records))
+    return schema.coerce_repairs(pd.DataFrame.from_records(records, columns=COLUMNS))
+
+
+def _filters(area, vehicle_id, date_from, date_to):
+    clauses, params = [], []
+    for clause, value in (
+        ("area = ?", clean_value(area)),
+        ("vehicle_id = ?", clean_value(vehicle_id)),
+        ("date >= ?", schema.date_value(date_from)),
+        ("date <= ?", schema.date_value(date_to)),
+    ):
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+    return clauses, params
+
+
+def _matching(sheet, area, vehicle_id, date_from, date_to):
+    """SQL selecting the rows of `sheet` that pass the filters, and its params.
+
+    Filters apply to vehicle blocks: a block (its vehicle row, repair lines
+    and total row) matches as a whole when its vehicle row matches.
+    """
+    clauses, params = _filters(area, vehicle_id, date_from, date_to)
+    if clauses:
+        # Each row belongs to the block opened by the latest vehicle row at
+        # or before it.
+        matching = f"""
+            WITH sheet_rows AS (
+                SELECT *, MAX(CASE WHEN vehicle_id IS NOT NULL THEN id END)
+                          OVER (ORDER BY id ROWS UNBOUNDED PRECEDING) AS block
+                FROM repairs WHERE sheet = ?
+            )
+            SELECT * FROM sheet_rows WHERE block IN (
+                SELECT id FROM sheet_rows WHERE vehicle_id IS NOT NULL AND {' AND '.join(clauses)}
+            )
+        """
+        params = [sheet, *params]
+    else:
+        matching = "SELECT * FROM repairs WHERE sheet = ?"
+        params = [sheet]
+    return matching, params
+
+
+def count_sheet(sheet, area=None, vehicle_id=None, date_from=None, date_to=None, db_file=DB_FILE):
+    """Number of rows of `sheet` matching the query_sheet() filters."""
+    matching, params = _matching(sheet, area, vehicle_id, date_from, date_to)
+    with closing(connect(db_file)) as conn:
+        (count,) = conn.execute(f"SELECT COUNT(*) FROM ({matching})", params).fetchone()
+    return count
+
+
+def query_sheet(sheet, area=None, vehicle_id=None, date_from=None, date_to=None,
+                offset=0, limit=50, db_file=DB_FILE):
+    """Return one page of the rows of `sheet` matching the filters.
+
+    The page is a typed frame indexed by ledger row id, for apply_edits().
+    """
+    matching, params = _matching(sheet, area, vehicle_id, date_from, date_to)
+    with closing(connect(db_file)) as conn:
+        records = conn.execute(
+            f"SELECT id, {', '.join(_FIELDS)} FROM ({matching}) ORDER BY id LIMIT ? OFFSET ?",
+            (*params, limit, offset),
+        ).fetchall()
+    df = pd.DataFrame.from_records([record[1:] for record in records], columns=COLUMNS)
+    df = schema.coerce_repairs(df)
+    df.index = pd.Index([record[0] for record in records], name="id")
+    return df
+
+
+_CONVERTERS = {
+    "No.": lambda value: None if clean_value(value) is None else int(clean_value(value)),
+    "Area": clean_value,
+    "Vehicle ID": clean_value,
+    "Date": schema.date_value,
+    "Description": clean_value,
+    "Cost (ugx)": schema.cost_value,
+}
+
+
+def apply_edits(sheet, edited=None, added=None, deleted=None, db_file=DB_FILE):
+    """Persist editor deltas for `sheet` in one transaction.
+
+    `edited` maps ledger row id -> {column: new value}, `added` is a list of
+    {column: value} rows appended to the sheet and `deleted` a list of row
+    ids. Rows not mentioned are left untouched. Added vehicle rows without a
+    "No." continue the sheet's sequence.
+    """
+    updates = []
+    for row_id, changes in (edited or {}).items():
+        changes = {column: value for column, value in changes.items() if column in _CONVERTERS}
+        if changes:
+            assignments = ", ".join(f"{_FIELDS[COLUMNS.index(column)]} = ?" for column in changes)
+            values = [_CONVERTERS[column](value) for column, value in changes.items()]
+            updates.append((f"UPDATE repairs SET {assignments} WHERE id = ? AND sheet = ?", (*values, int(row_id), sheet)))
+
+    with closing(connect(db_file)) as conn, conn:
+        for statement, values in updates:
+            conn.execute(statement, values)
+        if deleted:
+            conn.executemany(
+                "DELETE FROM repairs WHERE id = ? AND sheet = ?",
+                [(int(row_id), sheet) for row_id in deleted],
+            )
+        if added:
+            added = [dict(row) for row in added]
+            entry_no = _next_entry_no(conn, sheet)
+            for row in added:
+                if clean_value(row.get("Vehicle ID")) is not None and clean_value(row.get("No.")) is None:
+                    row["No."] = entry_no
+                    entry_no += 1
+            _insert(conn, sheet, added)
+
+
+def sheet_names(db_file=DB_FILE):
+    with closing(connect(db_file)) as conn:
+        names = [name for (name,) in conn.execute("SELECT sheet FROM repairs GROUP BY sheet ORDER BY MIN(id)")]
+    return names
+
+
+def export_workbook(path=REPAIRS_FILE, sheets=None, db_file=DB_FILE):
+    """Write the ledger (or just `sheets`) out as a styled Excel workbook."""
+    sheets = sheet_names(db_file) if sheets is None else list(sheets)
+    if not sheets:
+        return path
+
+    with instrumentation.stage("ledger.export_workbook") as stage:
+        with locked_write(path) as tmp_path:
+            with pd.ExcelWriter(tmp_path, engine="openpyxl") as writer:
+                for sheet in sheets:
+                    df = read_sheet(sheet, db_file)
+                    excel_format.write_frame(writer, df, sheet)
+                    stage.add(rows=len(df))
+        stage.add(bytes_written=instrumentation.file_size(path))
+    return path
+
+
+def import_workbook(path=REPAIRS_FILE, db_file=DB_FILE):
+    """Load every sheet of an existing repairs workbook into the ledger.
+
+    Each sheet replaces the ledger rows of the same name, so running the
+    migration twice does not duplicate entries. Returns {sheet: row count}.
+    """
+    imported = {}
+    for sheet, df in pd.read_excel(path, sheet_name=None).items():
+        df = df.reindex(columns=COLUMNS)
+        replace_sheet(sheet, df, db_file)
+        imported[sheet] = len(df)
+    return imported
+
+
+def ensure_ledger(db_file=DB_FILE, workbook=REPAIRS_FILE):
+    """Create the ledger, importing the legacy workbook once per database.
+
+    The import is recorded in schema_migrations rather than inferred from
+    the database file existing, so a ledger first opened by something else
+    still picks the workbook up, and an interrupted import (one transaction)
+    is retried. Sheets the ledger already has are kept as they are.
+    """
+    def import_legacy(conn):
+        if not os.path.exists(workbook):
+            return
+        known = {sheet for (sheet,) in conn.execute("SELECT DISTINCT sheet FROM repairs")}
+        for sheet, df in pd.read_excel(workbook, sheet_name=None).items():
+            if sheet not in known:
+                _replace(conn, sheet, df)
+
+    with closing(connect(db_file)) as conn:
+        apply_migration(conn, "legacy_workbook_import", import_legacy)
+
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("migrate", "export"):
+        print("usage: python ledger.py migrate|export [workbook.xlsx]")
+        return 2
+    workbook = argv[2] if len(argv) > 2 else REPAIRS_FILE
+    if argv[1] == "migrate":
+        for sheet, count in import_workbook(workbook).items():
+            print(f"{sheet}: {count} rows")
+    else:
+        ensure_ledger()
+        print(export_workbook(workbook))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
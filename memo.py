@@ -0,0 +1,229 @@
+"""Template-based rendering of the monthly repair request memo.
+
+The memo layout lives in a .docx template (static/templates/repair_request.docx,
+created from build_template() the first time it is needed and safe to restyle
+in Word afterwards). Text uses {{field}} placeholders; the two tables each end
+in a prototype row which is cloned once per data row, so filling a table is a
+bulk XML copy rather than python-docx add_row()/cell.text calls.
+
+The fixed memo wording (recipients, garage, mechanic, signatory) comes from
+DEFAULT_FIELDS, overridden by static/templates/memo_fields.json if present.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from io import BytesIO
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml.ns import qn
+from docx.shared import Pt
+
+import instrumentation
+from write_coordinator import atomic_write
+
+TEMPLATE_DIR = os.path.join("static", "templates")
+TEMPLATE_FILE = os.path.join(TEMPLATE_DIR, "repair_request.docx")
+FIELDS_FILE = os.path.join(TEMPLATE_DIR, "memo_fields.json")
+
+SUMMARY_COLUMNS = ["No.", "Area", "Vehicle ID", "Date", "Total Cost (ugx)"]
+DETAILED_COLUMNS = ["No.", "Area", "Vehicle ID", "Date", "Description", "Cost (ugx)"]
+
+DEFAULT_FIELDS = {
+    "organisation": "MID-WESTERN UMBRELLA OF WATER AND SANITATION",
+    "memo_to": "Manager UWS-MW",
+    "memo_thru": "Administrator",
+    "memo_from": "Engineer UWS-MW",
+    "garage_name": "A&B Motorcycle Garage",
+    "mechanic": "Brian Asiimwe",
+    "operational_areas": "16",
+    "signatory_name": "MARVIN LUYOMBYA",
+    "signatory_title": "ENGINEER, MWUWS",
+}
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+_template_cache = {}
+_template_lock = threading.Lock()
+
+
+def build_template(path=TEMPLATE_FILE):
+    """Write the default memo template to `path`."""
+    doc = Document()
+    doc.styles['Normal'].font.name = 'Times New Roman'
+    doc.styles['Normal'].font.size = Pt(12)
+
+    p = doc.add_paragraph()
+    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run1 = p.add_run("{{organisation}}\n")
+    run1.bold = True
+    run1.font.size = Pt(14)
+
+    run2 = p.add_run("MEMO\n")
+    run2.bold = True
+    run2.font.size = Pt(14)
+
+    run3 = p.add_run("=" * 60)
+    run3.font.size = Pt(12)
+    run3.bold = True
+
+    to_section = doc.add_paragraph()
+    to_section.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    to_section.add_run("To:\t\t{{memo_to}}\n")
+    to_section.add_run("Thru:\t\t{{memo_thru}}\n")
+    to_section.add_run("From:\t\t{{memo_from}}\n")
+    to_section.add_run("Date:\t\t{{date}}")
+    to_section.add_run("\n")
+
+    subj = doc.add_paragraph()
+    subj_run = subj.add_run(
+        "SUBJECT:\tREQUEST FOR UGSHS {{total_cost}} /= "
+        "({{total_cost_words}} UGANDA SHILLINGS ONLY) "
+        "TO BE PAID TO {{garage_name_upper}} "
+        "FOR MOTORCYCLE MAINTENANCE SERVICES PROVIDED FOR NO. {{total_vehicles}} ({{total_vehicles_words}}) MOTORCYCLES."
+    )
+    subj_run.bold = True
+    subj_run.underline = True
+
+    body = doc.add_paragraph()
+    body.add_run(
+        "This is to request the release of the above-mentioned funds, intended for payment to "
+        "{{garage_name}} ({{mechanic}}) for conducting follow-up repairs and servicing "
+        "on No. {{total_vehicles}} motorcycles allocated across various areas under the Mid-Western Umbrella for the previous month.\n\n"
+        "Management resolved to engage {{mechanic}}, our currently assigned mechanic, to visit all No. {{operational_areas}} operational areas every month, "
+        "to enhance the mechanical condition and overall welfare of the motorcycles used by scheme staff.\n\n"
+        "Details of each motorcycle, including the Vehicle ID numbers, total charges, and dates of repair/servicing, have been summarized "
+        "in the table below:"
+    )
+    _add_prototype_table(doc, SUMMARY_COLUMNS)
+
+    body2 = doc.add_paragraph()
+    body2.add_run(
+        "\nThe individual costs for each motorcycle repair and service are further broken down as follows; "
+    )
+    _add_prototype_table(doc, DETAILED_COLUMNS)
+
+    doc.add_paragraph().add_run("\n{{signatory_name}}")
+    doc.add_paragraph().add_run("\n{{signatory_title}}")
+
+    with atomic_write(path) as tmp_path:
+        doc.save(tmp_path)
+    return path
+
+
+def _add_prototype_table(doc, columns):
+    table = doc.add_table(rows=2, cols=len(columns))
+    table.style = 'Table Grid'
+    for idx, column in enumerate(columns):
+        table.rows[0].cells[idx].text = column
+        # Any text will do: it only guarantees the cell has a run to fill in.
+        table.rows[1].cells[idx].text = "-"
+    return table
+
+
+def load_fields(path=FIELDS_FILE):
+    fields = dict(DEFAULT_FIELDS)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            fields.update(json.load(f))
+    return fields
+
+
+def ensure_template(path=TEMPLATE_FILE):
+    """Build the default template at `path` unless a template is already there."""
+    if not os.path.exists(path):
+        with _template_lock:
+            if not os.path.exists(path):
+                build_template(path)
+    return path
+
+
+def _template_bytes(path):
+    ensure_template(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get(path)
+    if cached is None or cached[0] != signature:
+        with open(path, "rb") as f:
+            cached = (signature, f.read())
+        _template_cache[path] = cached
+    return cached[1]
+
+
+def _fill_paragraph(paragraph, values):
+    for run in paragraph.runs:
+        if "{{" in run.text:
+            run.text = _PLACEHOLDER.sub(lambda m: str(values.get(m.group(1), m.group(0))), run.text)
+    # A placeholder edited in Word may be split over several runs; fall back
+    # to rewriting the paragraph text into its first run.
+    if _PLACEHOLDER.search(paragraph.text) and paragraph.runs:
+        text = _PLACEHOLDER.sub(lambda m: str(values.get(m.group(1), m.group(0))), paragraph.text)
+        paragraph.runs[0].text = text
+        for run in paragraph.runs[1:]:
+            run.text = ""
+
+
+def _fill_table(table, rows):
+    """Replace the table's last (prototype) row with one cloned row per entry."""
+    tbl = table._tbl
+    prototype = tbl.tr_lst[-1]
+    new_rows = []
+    for values in rows:
+        tr = copy.deepcopy(prototype)
+        for tc, value in zip(tr.iterchildren(qn("w:tc")), values):
+            texts = tc.findall(".//" + qn("w:t"))
+            texts[0].text = str(value)
+            texts[0].set(_XML_SPACE, "preserve")
+            for extra in texts[1:]:
+                extra.text = ""
+        new_rows.append(tr)
+    tbl.remove(prototype)
+    tbl.extend(new_rows)
+
+
+def content_key(values, summary_rows, detailed_rows, template=TEMPLATE_FILE):
+    """Hash of everything render() output depends on: the template and its inputs."""
+    digest = hashlib.sha256(_template_bytes(template))
+    payload = [sorted(values.items()), summary_rows, detailed_rows]
+    digest.update(json.dumps(payload, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render(values, summary_rows, detailed_rows, template=TEMPLATE_FILE):
+    """Render the memo and return it as a python-docx Document.
+
+    `values` maps placeholder names to text; `summary_rows`/`detailed_rows`
+    are sequences of cell values in SUMMARY_COLUMNS/DETAILED_COLUMNS order.
+    """
+    with instrumentation.stage("memo.load_template") as stage:
+        template_bytes = _template_bytes(template)
+        doc = Document(BytesIO(template_bytes))
+        stage.add(bytes_read=len(template_bytes))
+
+    with instrumentation.stage("memo.fill") as stage:
+        for paragraph in doc.paragraphs:
+            if "{{" in paragraph.text:
+                _fill_paragraph(paragraph, values)
+
+        summary_table, detailed_table = doc.tables[:2]
+        _fill_table(summary_table, summary_rows)
+        _fill_table(detailed_table, detailed_rows)
+        stage.add(rows=len(summary_rows) + len(detailed_rows))
+    return doc
+
+
+def memo_values(fields, date, total_cost, total_cost_words, total_vehicles, total_vehicles_words):
+    values = dict(fields)
+    values.update({
+        "garage_name_upper": fields["garage_name"].upper(),
+        "date": date,
+        "total_cost": total_cost,
+        "total_cost_words": total_cost_words,
+        "total_vehicles": total_vehicles,
+        "total_vehicles_words": total_vehicles_words,
+    })
+    return values
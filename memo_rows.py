@@ -0,0 +1,65 @@
+"""Columnar preparation of the memo tables.
+
+Turns a month's typed repair sheet (ledger.read_sheet, or any frame passed
+through schema.coerce_repairs) into the row tuples
+memo.render() consumes. Date formatting, blanking of missing values and
+thousands separators run once per column instead of once per cell through
+.iloc.
+"""
+import pandas as pd
+
+from amounts import format_costs, ugx
+from schema import TOTAL_LABEL
+
+DATE_FORMAT = "%d, %b, %Y"
+
+
+def format_dates(dates):
+    return dates.dt.strftime(DATE_FORMAT).fillna("")
+
+
+def _text(values):
+    return values.where(values.notna(), "").astype(str)
+
+
+def _numbers(values):
+    return pd.to_numeric(values).astype("Int64").astype("string").fillna("")
+
+
+def totals(df):
+    """(total cost, number of vehicles) of a month."""
+    total_costs = df.loc[df["Description"] == TOTAL_LABEL, "Cost (ugx)"]
+    return int(total_costs.sum()), int(df["Vehicle ID"].nunique())
+
+
+def summary_rows(df):
+    """One row per vehicle plus the closing "Total Amount (ugx)" row."""
+    vehicles = df[df["Vehicle ID"].notna()]
+    total_costs = df.loc[df["Description"] == TOTAL_LABEL, "Cost (ugx)"]
+
+    # The n-th vehicle block closes with the n-th total row.
+    block_costs = format_costs(total_costs).tolist()[:len(vehicles)]
+    block_costs += [""] * (len(vehicles) - len(block_costs))
+
+    rows = list(zip(
+        _numbers(vehicles["No."]),
+        _text(vehicles["Area"]),
+        _text(vehicles["Vehicle ID"]),
+        format_dates(vehicles["Date"]),
+        block_costs,
+    ))
+    total_amount = int(total_costs.sum())
+    rows.append(("", "", "", "Total Amount (ugx)", ugx(total_amount) if total_amount else ""))
+    return rows
+
+
+def detailed_rows(df):
+    """Every line of the sheet, blanks where the sheet had empty cells."""
+    return list(zip(
+        _numbers(df["No."]),
+        _text(df["Area"]),
+        _text(df["Vehicle ID"]),
+        format_dates(df["Date"]),
+        _text(df["Description"]),
+        format_costs(df["Cost (ugx)"]),
+    ))
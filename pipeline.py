@@ -0,0 +1,260 @@
+"""The repair workflow, callable outside the Streamlit UI (see cli.py).
+
+Nothing here imports streamlit. submit_entry() records one vehicle's repairs;
+the month-end steps take the ledger sheet name (the %d-%m-%Y submission date)
+and an optional progress(fraction, message) callback, and return a small dict
+of results so they can run as background jobs (see jobs.py). Each of them
+calls ledger.ensure_ledger() first, so a run without the app on an existing
+install still imports the legacy workbook.
+
+Generated memos are cached: the `memo_outputs` table remembers the content
+key (memo.content_key) each file was rendered from, so regenerating an
+unchanged sheet returns the existing file without rendering it again.
+generate_requests() renders many sheets/garages in parallel processes.
+"""
+import datetime
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing
+from io import BytesIO
+
+import pandas as pd
+
+import amounts
+import history_store
+import instrumentation
+import ledger
+import memo
+import memo_rows
+import schema
+import vehicle_index
+from write_coordinator import locked_write
+
+OUTPUT_FOLDER = os.path.join("static", "generated_requests")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memo_outputs (
+    path TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+def _connect(db_file=ledger.DB_FILE):
+    conn = ledger.connect(db_file)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def today_sheet():
+    """Name of today's ledger sheet, the submission date as %d-%m-%Y."""
+    return datetime.date.today().strftime("%d-%m-%Y")
+
+
+def default_repair_date():
+    """First day of the previous month, the usual date of a month's repairs."""
+    return (datetime.date.today().replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+
+
+def build_entry(area, vehicle, date, lines):
+    """Ledger rows for one vehicle's repairs.
+
+    `lines` is a sequence of (description, cost) pairs; lines with neither a
+    description nor a cost are skipped. The first kept line carries the area,
+    vehicle and date, and a "Total Cost (ugx)" row closes the block.
+    """
+    rows = []
+    for description, cost in lines:
+        description = (description or "").strip()
+        if not description and cost in (None, 0):
+            continue
+        rows.append({
+            "No.": "",
+            "Area": "" if rows else area,
+            "Vehicle ID": "" if rows else vehicle,
+            "Date": None if rows or date is None else pd.to_datetime(date),
+            "Description": description,
+            "Cost (ugx)": cost,
+        })
+    rows.append({
+        "No.": "",
+        "Area": "",
+        "Vehicle ID": "",
+        "Date": None,
+        "Description": schema.TOTAL_LABEL,
+        "Cost (ugx)": sum(cost or 0 for _, cost in lines),
+    })
+    return rows
+
+
+@instrumentation.timed("pipeline.submit_entry")
+def submit_entry(sheet_name, area, vehicle, date, lines):
+    """Append one vehicle's repairs to `sheet_name`; "No." continues the sheet's numbering."""
+    rows = build_entry(area, vehicle, date, lines)
+    ledger.ensure_ledger()
+    ledger.append_rows(sheet_name, rows)
+    return {"sheet": sheet_name, "lines": len(rows) - 1, "total_cost": rows[-1]["Cost (ugx)"]}
+
+
+def export_repairs(path=ledger.REPAIRS_FILE):
+    """Write the repairs workbook from the ledger; returns its path."""
+    ledger.ensure_ledger()
+    return ledger.export_workbook(path)
+
+
+def export_history(path=history_store.HISTORY_FILE):
+    """Write the repair history workbook from the history store; returns its path."""
+    history_store.export_history(path)
+    return path
+
+
+def _report(progress, fraction, message):
+    if progress is not None:
+        progress(fraction, message)
+
+
+def request_path(sheet_name, garage=None):
+    """Output file of the memo for `sheet_name` (and `garage`, if not the default one)."""
+    try:
+        label = datetime.datetime.strptime(sheet_name, "%d-%m-%Y").strftime("%d-%b-%Y")
+    except ValueError:
+        label = sheet_name
+    if garage:
+        label += "_" + re.sub(r"[^A-Za-z0-9]+", "_", garage).strip("_")
+    return os.path.join(OUTPUT_FOLDER, f"repair_request_{label}.docx")
+
+
+def _cached_output(path, key):
+    """True if `path` is still the file rendered from content `key`."""
+    with closing(_connect()) as conn:
+        state = conn.execute("SELECT key, mtime_ns, size FROM memo_outputs WHERE path = ?", (path,)).fetchone()
+    if state is None or state[0] != key or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size) == (state[1], state[2])
+
+
+def _record_output(path, key):
+    stat = os.stat(path)
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO memo_outputs (path, key, mtime_ns, size) VALUES (?, ?, ?, ?)",
+            (path, key, stat.st_mtime_ns, stat.st_size),
+        )
+
+
+@instrumentation.timed("pipeline.generate_request")
+def generate_request(sheet_name, progress=None, fields=None, force=False):
+    """Render the fund request memo for `sheet_name` into OUTPUT_FOLDER.
+
+    `fields` overrides memo fields (e.g. another garage). The memo is only
+    rendered if its content changed since the file was last written, or
+    with force=True.
+    """
+    _report(progress, 0.05, "Reading repair entries")
+    ledger.ensure_ledger()
+    monthly_repairs_df = ledger.read_sheet(sheet_name)
+    total_cost, total_vehicles = memo_rows.totals(monthly_repairs_df)
+
+    memo_values = memo.memo_values(
+        {**memo.load_fields(), **(fields or {})},
+        date=datetime.date.today().strftime("%d/%B/%Y"),
+        total_cost=amounts.ugx(total_cost),
+        total_cost_words=amounts.words(total_cost),
+        total_vehicles=total_vehicles,
+        total_vehicles_words=amounts.words(total_vehicles),
+    )
+
+    _report(progress, 0.2, "Preparing tables")
+    with instrumentation.stage("memo_rows") as stage:
+        summary_rows = memo_rows.summary_rows(monthly_repairs_df)
+        detailed_rows = memo_rows.detailed_rows(monthly_repairs_df)
+        stage.add(rows=len(monthly_repairs_df))
+
+    output_path = request_path(sheet_name, (fields or {}).get("garage_name"))
+    result = {
+        "path": output_path,
+        "vehicles": total_vehicles,
+        "lines": len(detailed_rows),
+        "total_cost": total_cost,
+    }
+    key = memo.content_key(memo_values, summary_rows, detailed_rows)
+    if not force and _cached_output(output_path, key):
+        _report(progress, 1.0, "Repair request unchanged since it was last generated")
+        return {**result, "cached": True}
+
+    _report(progress, 0.4, f"Rendering {len(detailed_rows)} repair lines")
+    doc = memo.render(memo_values, summary_rows, detailed_rows)
+
+    _report(progress, 0.8, "Saving document")
+    with instrumentation.stage("docx.save") as stage:
+        doc_io = BytesIO()
+        doc.save(doc_io)
+        stage.add(bytes_written=doc_io.tell())
+
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    with instrumentation.stage("write_request"), locked_write(output_path) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(doc_io.getbuffer())
+    _record_output(output_path, key)
+
+    _report(progress, 1.0, "Repair request document generated")
+    return {**result, "cached": False}
+
+
+def _generate_in_worker(sheet_name, fields, force):
+    return generate_request(sheet_name, fields=fields, force=force)
+
+
+def generate_requests(sheet_names, garages=None, workers=None, force=False, progress=None):
+    """Generate the memos of several sheets in parallel worker processes.
+
+    `garages` is an optional list of memo field overrides (one memo per sheet
+    and garage). Unchanged memos are served from the cache as in
+    generate_request(). Returns a list of result dicts in completion order;
+    a failed memo has "sheet" and "error" instead of the usual fields.
+    """
+    tasks = [(sheet, fields) for sheet in sheet_names for fields in (garages or [None])]
+    if not tasks:
+        return []
+    # Build the template and import the legacy workbook once here rather
+    # than racing to in every worker.
+    memo.ensure_template()
+    ledger.ensure_ledger()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_generate_in_worker, sheet, fields, force): sheet for sheet, fields in tasks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            sheet = futures[future]
+            try:
+                results.append({"sheet": sheet, **future.result()})
+            except Exception as exc:
+                results.append({"sheet": sheet, "error": f"{type(exc).__name__}: {exc}"})
+            _report(progress, done / len(tasks), f"{done} of {len(tasks)} memos done")
+    return results
+
+
+@instrumentation.timed("pipeline.update_vehicle_records")
+def update_vehicle_records(sheet_name, progress=None):
+    """Add the vehicles of `sheet_name` to the repair history."""
+    _report(progress, 0.1, "Grouping repairs per vehicle")
+    ledger.ensure_ledger()
+    monthly_repairs_df = ledger.read_sheet(sheet_name)
+    with instrumentation.stage("history.group_vehicle_repairs") as stage:
+        repair_df = history_store.group_vehicle_repairs(monthly_repairs_df)
+        stage.add(rows=len(monthly_repairs_df))
+
+    _report(progress, 0.4, "Updating history")
+    history_store.ensure_history()
+    added = history_store.upsert(repair_df)
+
+    _report(progress, 0.6, "Updating vehicle index")
+    with instrumentation.stage("vehicle_index.refresh") as stage:
+        stage.add(rows=vehicle_index.refresh())
+
+    _report(progress, 1.0, "Vehicle repair history updated")
+    return {"vehicles": len(repair_df), "added": added}
@@ -0,0 +1,72 @@
+"""Process-wide cache for the reference workbooks (areas and vehicles).
+
+Streamlit re-executes app.py on every interaction, so the lists that feed the
+Area/Vehicle selectboxes are parsed once per process here and shared by every
+session. A cached list is reused until the workbook's mtime or size changes,
+or until refresh() is called.
+"""
+import os
+import sys
+import threading
+
+import pandas as pd
+
+import instrumentation
+
+AREAS_FILE = os.path.join("static", "areas.xlsx")
+VEHICLES_FILE = os.path.join("static", "vehicles.xlsx")
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _parse(path, column):
+    with instrumentation.stage("reference_data.read_excel") as stage:
+        values = pd.read_excel(path, usecols=[column])[column].dropna().astype(str).str.strip()
+        stage.add(rows=len(values), bytes_read=instrumentation.file_size(path))
+    # Keep first-seen order (same as .unique()) and intern the strings so every
+    # session shares one copy of each name.
+    return tuple(sys.intern(v) for v in dict.fromkeys(values) if v)
+
+
+def load_list(path, column):
+    """Return the unique, non-empty values of `column` in `path` as a tuple.
+
+    A missing workbook yields an empty tuple so the form can fall back to free
+    text inputs, exactly as it did before.
+    """
+    signature = _signature(path)
+    key = (path, column)
+    cached = _cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        values = _parse(path, column) if signature is not None else ()
+        _cache[key] = (signature, values)
+        return values
+
+
+def load_areas():
+    return load_list(AREAS_FILE, "Area")
+
+
+def load_vehicles():
+    return load_list(VEHICLES_FILE, "Vehicle")
+
+
+def refresh():
+    """Drop every cached list; the next load re-reads the workbooks."""
+    with _lock:
+        _cache.clear()
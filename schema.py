@@ -0,0 +1,124 @@
+"""Typed schema shared by every repair data path.
+
+Inside the app, repair rows carry int64 costs (nullable Int64 where a cell may
+be blank) and datetime64 dates. Thousands separators and "%d-%b-%Y" style
+dates are presentation only: Excel gets them from number formats
+(EXCEL_FORMATS) and the memo from memo_rows at render time. The ledger stores
+costs as INTEGER and dates as ISO "YYYY-MM-DD" text.
+"""
+import datetime
+
+import pandas as pd
+
+REPAIR_COLUMNS = ["No.", "Area", "Vehicle ID", "Date", "Description", "Cost (ugx)"]
+HISTORY_COLUMNS = ["Area", "Vehicle ID", "Date", "Descriptions", "Total Cost (ugx)"]
+
+TOTAL_LABEL = "Total Cost (ugx)"
+COST_COLUMNS = ("Cost (ugx)", "Total Cost (ugx)")
+DATE_COLUMNS = ("Date",)
+
+ISO_DATE = "%Y-%m-%d"
+SHEET_DATE = "%d-%b-%Y"
+
+EXCEL_COST_FORMAT = "#,##0"
+EXCEL_DATE_FORMAT = "DD-MMM-YYYY"
+EXCEL_FORMATS = {
+    **{column: EXCEL_COST_FORMAT for column in COST_COLUMNS},
+    **{column: EXCEL_DATE_FORMAT for column in DATE_COLUMNS},
+}
+
+
+def _missing(value):
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return value.strip() == ""
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def cost_value(value):
+    """A single cost as int ("12,000", 12000.0 and 12000 all give 12000)."""
+    if _missing(value):
+        return None
+    if isinstance(value, str):
+        return int(value.replace(",", "").strip())
+    return int(value)
+
+
+def date_value(value):
+    """A single date as ISO "YYYY-MM-DD" text, or None when blank."""
+    if _missing(value):
+        return None
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        return value.strftime(ISO_DATE)
+    text = str(value).strip()
+    for fmt in (ISO_DATE, SHEET_DATE):
+        try:
+            return datetime.datetime.strptime(text, fmt).strftime(ISO_DATE)
+        except ValueError:
+            pass
+    return pd.to_datetime(text).strftime(ISO_DATE)
+
+
+def _present(values):
+    """Boolean mask of non-missing, non-empty cells."""
+    return values.notna() & values.astype("string").str.strip().ne("").fillna(False).astype(bool)
+
+
+def parse_costs(values):
+    """Parse a cost column ("12,000", 12000 or blank) into nullable Int64."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("Int64")
+    text = values.astype("string").str.replace(",", "", regex=False).str.strip().replace("", pd.NA)
+    try:
+        # Whole-number text converts directly, far faster than to_numeric().
+        return text.astype("Int64")
+    except (TypeError, ValueError):
+        return pd.to_numeric(text).astype("Int64")
+
+
+def parse_dates(values):
+    """Parse a date column into datetime64, trying the stored formats first."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    parsed = pd.to_datetime(values, format=ISO_DATE, errors="coerce")
+    present = _present(values)
+    missed = parsed.isna() & present
+    if missed.any():
+        parsed[missed] = pd.to_datetime(values[missed], format=SHEET_DATE, errors="coerce")
+        missed = parsed.isna() & present
+        if missed.any():
+            parsed[missed] = pd.to_datetime(values[missed])
+    return parsed
+
+
+def _text(values):
+    return values.astype(object).where(_present(values), None)
+
+
+def coerce_repairs(df):
+    """Return a repairs frame (REPAIR_COLUMNS) with its typed dtypes."""
+    df = df.reindex(columns=REPAIR_COLUMNS)
+    return pd.DataFrame({
+        "No.": pd.to_numeric(df["No."].replace("", pd.NA)).astype("Int64"),
+        "Area": _text(df["Area"]),
+        "Vehicle ID": _text(df["Vehicle ID"]),
+        "Date": parse_dates(df["Date"]),
+        "Description": _text(df["Description"]),
+        "Cost (ugx)": parse_costs(df["Cost (ugx)"]),
+    }, index=df.index)
+
+
+def coerce_history(df):
+    """Return a history frame (HISTORY_COLUMNS) with its typed dtypes."""
+    df = df.reindex(columns=HISTORY_COLUMNS)
+    return pd.DataFrame({
+        "Area": _text(df["Area"]),
+        "Vehicle ID": _text(df["Vehicle ID"]),
+        "Date": parse_dates(df["Date"]),
+        "Descriptions": _text(df["Descriptions"]),
+        "Total Cost (ugx)": parse_costs(df["Total Cost (ugx)"]),
+    }, index=df.index)
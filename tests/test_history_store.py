@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+
+import excel_format
+import history_store
+import schema
+
+
+def legacy_history():
+    return schema.coerce_history(pd.DataFrame({
+        "Area": ["Kasese", "Hoima"],
+        "Vehicle ID": ["UG 0001X", "UG 0002X"],
+        "Date": ["2025-09-01", "2025-09-02"],
+        "Descriptions": ["Brake pads", "Engine oil"],
+        "Total Cost (ugx)": [25000, 12000],
+    }))
+
+
+def test_export_before_the_first_update_keeps_the_legacy_history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static")
+    excel_format.save_frame(history_store.HISTORY_FILE, legacy_history())
+
+    assert history_store.export_history() == 2
+
+    exported = pd.read_excel(history_store.HISTORY_FILE)
+    assert exported["Vehicle ID"].tolist() == ["UG 0001X", "UG 0002X"]
+    history_store.ensure_history()
+    assert len(history_store.read_history()[0]) == 2
+
+
+def test_empty_store_does_not_overwrite_an_existing_workbook(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static")
+    path = str(tmp_path / "elsewhere.xlsx")
+    excel_format.save_frame(path, legacy_history())
+    before = os.stat(path).st_mtime_ns
+
+    assert history_store.export_history(path) == 0
+    assert os.stat(path).st_mtime_ns == before
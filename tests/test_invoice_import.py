@@ -0,0 +1,47 @@
+import datetime
+
+import pytest
+
+import invoice_import
+import ledger
+import reference_data
+
+
+@pytest.fixture(autouse=True)
+def reference_lists(monkeypatch):
+    monkeypatch.setattr(reference_data, "load_areas", lambda: ("Kasese", "Hoima"))
+    monkeypatch.setattr(reference_data, "load_vehicles", lambda: ("UG 0001X", "UG 0002X"))
+
+
+def test_day_first_dates_are_stored_day_first(tmp_path):
+    invoice = tmp_path / "invoice.csv"
+    invoice.write_text(
+        "Area,Vehicle,Date,Description,Cost\n"
+        "Kasese,UG 0001X,02/09/2026,Brake pads,\"25,000\"\n"
+        ",,,Chain,15000\n"
+        "Hoima,UG 0002X,13/09/2026,Engine oil,12000\n"
+    )
+    db_file = str(tmp_path / "repairs.db")
+
+    summary = invoice_import.import_invoice(str(invoice), "05-10-2026", db_file=db_file)
+
+    assert summary == {"lines": 3, "vehicles": 2, "total_cost": 52000, "sheet": "05-10-2026"}
+    df = ledger.read_sheet("05-10-2026", db_file)
+    vehicles = df[df["Vehicle ID"].notna()]
+    assert [d.date() for d in vehicles["Date"]] == [datetime.date(2026, 9, 2), datetime.date(2026, 9, 13)]
+    assert df["Cost (ugx)"].tolist() == [25000, 15000, 40000, 12000, 12000]
+
+
+def test_unknown_date_format_is_reported_not_guessed(tmp_path):
+    invoice = tmp_path / "invoice.csv"
+    invoice.write_text(
+        "Area,Vehicle,Date,Description,Cost\n"
+        "Kasese,UG 0001X,09/02/26,Brake pads,25000\n"
+    )
+    db_file = str(tmp_path / "repairs.db")
+
+    with pytest.raises(invoice_import.InvoiceError) as error:
+        invoice_import.import_invoice(str(invoice), "05-10-2026", db_file=db_file)
+
+    assert error.value.problems == ["line 2: unreadable date '09/02/26'"]
+    assert ledger.read_sheet("05-10-2026", db_file).empty
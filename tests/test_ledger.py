@@ -0,0 +1,71 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+import excel_format
+import history_store
+import ledger
+import pipeline
+import schema
+
+
+@pytest.fixture(autouse=True)
+def no_batching_window(monkeypatch):
+    monkeypatch.setattr(ledger._append_batcher, "window", 0)
+
+
+def submit(db_file, vehicle, lines):
+    rows = pipeline.build_entry("Kasese", vehicle, datetime.date(2026, 9, 1), lines)
+    ledger.append_rows("05-10-2026", rows, db_file)
+
+
+def test_entry_numbers_are_not_reused_after_a_block_is_deleted(tmp_path):
+    db_file = str(tmp_path / "repairs.db")
+    submit(db_file, "V1", [("tyre", 1000)])
+    submit(db_file, "V2", [("brake", 2000)])
+    submit(db_file, "V3", [("oil", 3000)])
+    page = ledger.query_sheet("05-10-2026", vehicle_id="V1", db_file=db_file)
+    ledger.apply_edits("05-10-2026", deleted=list(page.index), db_file=db_file)
+    submit(db_file, "V4", [("chain", 3000)])
+
+    df = ledger.read_sheet("05-10-2026", db_file)
+    vehicles = df[df["Vehicle ID"].notna()]
+    assert vehicles["No."].tolist() == [2, 3, 4]
+    records = history_store.group_vehicle_repairs(df)
+    assert records["Vehicle ID"].tolist() == ["V2", "V3", "V4"]
+    assert records["Descriptions"].tolist() == ["brake", "oil", "chain"]
+    assert records["Total Cost (ugx)"].tolist() == [2000, 3000, 3000]
+
+
+def test_vehicle_row_added_in_the_editor_opens_its_own_block(tmp_path):
+    db_file = str(tmp_path / "repairs.db")
+    submit(db_file, "V1", [("tyre", 1000)])
+    ledger.apply_edits("05-10-2026", added=[
+        {"Area": "Hoima", "Vehicle ID": "V2", "Date": "2026-09-03", "Description": "oil", "Cost (ugx)": 4000},
+    ], db_file=db_file)
+
+    df = ledger.read_sheet("05-10-2026", db_file)
+    assert df.loc[df["Vehicle ID"] == "V2", "No."].tolist() == [2]
+    records = history_store.group_vehicle_repairs(df)
+    assert records["Vehicle ID"].tolist() == ["V1", "V2"]
+    assert records["Area"].tolist() == ["Kasese", "Hoima"]
+    assert records["Total Cost (ugx)"].tolist() == [1000, 4000]
+
+
+def test_headless_run_imports_the_legacy_workbook_into_an_existing_ledger(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy = pd.DataFrame([
+        {"No.": 1, "Area": "Kasese", "Vehicle ID": "V1", "Date": "2025-09-01", "Description": "tyre", "Cost (ugx)": 1000},
+        {"Description": schema.TOTAL_LABEL, "Cost (ugx)": 1000},
+    ], columns=ledger.COLUMNS)
+    excel_format.save_frame(ledger.REPAIRS_FILE, schema.coerce_repairs(legacy), sheet_name="05-09-2025")
+    # Something other than the app opens the database first.
+    ledger.connect().close()
+
+    pipeline.submit_entry("05-10-2026", "Hoima", "V2", datetime.date(2026, 9, 1), [("oil", 2000)])
+    pipeline.export_repairs()
+
+    assert list(pd.read_excel(ledger.REPAIRS_FILE, sheet_name=None)) == ["05-09-2025", "05-10-2026"]
+    ledger.ensure_ledger()
+    assert len(ledger.read_sheet("05-09-2025")) == 2
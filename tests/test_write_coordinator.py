@@ -0,0 +1,45 @@
+import os
+import stat
+
+import pytest
+
+import write_coordinator
+from write_coordinator import locked_write
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+def write(path, text):
+    with locked_write(path) as tmp_path:
+        with open(tmp_path, "w") as f:
+            f.write(text)
+
+
+def test_new_file_gets_the_umask_default_mode(tmp_path):
+    path = str(tmp_path / "out" / "memo.docx")
+    write(path, "memo")
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == write_coordinator._DEFAULT_MODE
+
+
+def test_replaced_file_keeps_its_mode(tmp_path):
+    path = str(tmp_path / "repairs.xlsx")
+    write(path, "first")
+    os.chmod(path, 0o640)
+    write(path, "second")
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    with open(path) as f:
+        assert f.read() == "second"
+
+
+def test_lock_files_stay_out_of_the_output_folder(tmp_path):
+    out = tmp_path / "generated_requests"
+    write(str(out / "a.docx"), "a")
+    write(str(out / "b.docx"), "b")
+
+    assert sorted(os.listdir(out)) == ["a.docx", "b.docx"]
+    assert len(os.listdir(write_coordinator.LOCK_DIR)) == 2
@@ -0,0 +1,214 @@
+"""Per-vehicle summary of the repair history, kept up to date incrementally.
+
+The history store holds one record per vehicle visit, so questions like "when
+was this vehicle last repaired and what has it cost this year" would mean
+scanning every record. This index keeps, per vehicle, the first and last
+repair date, the number of visits, running cost totals (with the sum of
+squares, for the cost spread) and visit counts/costs per month.
+
+refresh() folds in only the history records added since it last ran; it is
+called by pipeline.update_vehicle_records after the history upsert. lookup()
+and flag_cost() read the index alone, never the history table or workbook.
+"""
+from contextlib import closing
+
+import history_store
+import ledger
+
+# A visit is unusual if it costs more than ANOMALY_SIGMAS standard deviations
+# above the vehicle's average, once the vehicle has MIN_VISITS visits.
+ANOMALY_SIGMAS = 3.0
+MIN_VISITS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicle_index (
+    vehicle_id TEXT PRIMARY KEY,
+    area TEXT,
+    first_date TEXT,
+    last_date TEXT,
+    visits INTEGER NOT NULL,
+    total_cost INTEGER NOT NULL,
+    cost_squares REAL NOT NULL,
+    max_cost INTEGER
+);
+CREATE TABLE IF NOT EXISTS vehicle_months (
+    vehicle_id TEXT NOT NULL,
+    month TEXT NOT NULL,
+    visits INTEGER NOT NULL,
+    total_cost INTEGER NOT NULL,
+    PRIMARY KEY (vehicle_id, month)
+);
+CREATE TABLE IF NOT EXISTS vehicle_index_state (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+_UPSERT_VEHICLE = """
+INSERT INTO vehicle_index (vehicle_id, area, first_date, last_date, visits, total_cost, cost_squares, max_cost)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (vehicle_id) DO UPDATE SET
+    area = CASE WHEN last_date IS NULL OR excluded.last_date >= last_date THEN excluded.area ELSE area END,
+    first_date = COALESCE(MIN(first_date, excluded.first_date), first_date, excluded.first_date),
+    last_date = COALESCE(MAX(last_date, excluded.last_date), last_date, excluded.last_date),
+    visits = visits + excluded.visits,
+    total_cost = total_cost + excluded.total_cost,
+    cost_squares = cost_squares + excluded.cost_squares,
+    max_cost = MAX(COALESCE(max_cost, 0), excluded.max_cost)
+"""
+
+_UPSERT_MONTH = """
+INSERT INTO vehicle_months (vehicle_id, month, visits, total_cost)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (vehicle_id, month) DO UPDATE SET
+    visits = visits + excluded.visits,
+    total_cost = total_cost + excluded.total_cost
+"""
+
+
+def connect(db_file=ledger.DB_FILE):
+    conn = history_store.connect(db_file)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _later(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+
+def _earlier(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a, b)
+
+
+def refresh(db_file=ledger.DB_FILE):
+    """Add the history records not indexed yet; returns how many were added."""
+    with closing(connect(db_file)) as conn:
+        # BEGIN IMMEDIATE so two refreshes cannot index the same records twice.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = conn.execute("SELECT last_id FROM vehicle_index_state WHERE name = 'history'").fetchone()
+            last_id = state[0] if state else 0
+            records = conn.execute(
+                "SELECT id, area, vehicle_id, date, total_cost FROM history WHERE id > ? ORDER BY id",
+                (last_id,),
+            ).fetchall()
+
+            vehicles = {}
+            months = {}
+            for record_id, area, vehicle_id, date, cost in records:
+                last_id = record_id
+                if vehicle_id is None:
+                    continue
+                cost = cost or 0
+                entry = vehicles.setdefault(vehicle_id, [None, None, None, 0, 0, 0.0, 0])
+                if entry[2] is None or (date is not None and date >= entry[2]):
+                    entry[0] = area
+                entry[1] = _earlier(entry[1], date)
+                entry[2] = _later(entry[2], date)
+                entry[3] += 1
+                entry[4] += cost
+                entry[5] += float(cost) * cost
+                entry[6] = max(entry[6], cost)
+                if date is not None:
+                    month = months.setdefault((vehicle_id, date[:7]), [0, 0])
+                    month[0] += 1
+                    month[1] += cost
+
+            conn.executemany(_UPSERT_VEHICLE, [(vehicle_id, *entry) for vehicle_id, entry in vehicles.items()])
+            conn.executemany(_UPSERT_MONTH, [(*key, *totals) for key, totals in months.items()])
+            conn.execute(
+                "INSERT OR REPLACE INTO vehicle_index_state (name, last_id) VALUES ('history', ?)",
+                (last_id,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return len(records)
+
+
+def rebuild(db_file=ledger.DB_FILE):
+    """Drop the index and build it again from the whole history."""
+    with closing(connect(db_file)) as conn, conn:
+        conn.execute("DELETE FROM vehicle_index")
+        conn.execute("DELETE FROM vehicle_months")
+        conn.execute("DELETE FROM vehicle_index_state")
+    return refresh(db_file)
+
+
+def _stats(visits, total_cost, cost_squares):
+    average = total_cost / visits
+    variance = max(cost_squares / visits - average * average, 0.0)
+    return average, variance ** 0.5
+
+
+def lookup(vehicle_id, months=12, year=None, db_file=ledger.DB_FILE):
+    """Index entry of `vehicle_id` as a dict, or None if it has no history.
+
+    "months" lists (YYYY-MM, visits, cost) for the latest `months` months
+    with repairs; "year_cost" is the cost in `year` (default: the year of
+    the last repair).
+    """
+    with closing(connect(db_file)) as conn:
+        row = conn.execute(
+            "SELECT area, first_date, last_date, visits, total_cost, cost_squares, max_cost "
+            "FROM vehicle_index WHERE vehicle_id = ?",
+            (vehicle_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        area, first_date, last_date, visits, total_cost, cost_squares, max_cost = row
+        monthly = conn.execute(
+            "SELECT month, visits, total_cost FROM vehicle_months WHERE vehicle_id = ? ORDER BY month DESC LIMIT ?",
+            (vehicle_id, months),
+        ).fetchall()
+        if year is None and last_date is not None:
+            year = last_date[:4]
+        (year_cost,) = conn.execute(
+            "SELECT COALESCE(SUM(total_cost), 0) FROM vehicle_months WHERE vehicle_id = ? AND month LIKE ?",
+            (vehicle_id, f"{year}-%"),
+        ).fetchone()
+
+    average, spread = _stats(visits, total_cost, cost_squares)
+    return {
+        "vehicle_id": vehicle_id,
+        "area": area,
+        "first_date": first_date,
+        "last_date": last_date,
+        "visits": visits,
+        "total_cost": total_cost,
+        "average_cost": average,
+        "cost_spread": spread,
+        "max_cost": max_cost,
+        "year": year,
+        "year_cost": year_cost,
+        "months": monthly[::-1],
+    }
+
+
+def flag_cost(vehicle_id, cost, db_file=ledger.DB_FILE):
+    """A warning if a visit costing `cost` is unusual for `vehicle_id`, else None."""
+    with closing(connect(db_file)) as conn:
+        row = conn.execute(
+            "SELECT visits, total_cost, cost_squares FROM vehicle_index WHERE vehicle_id = ?",
+            (vehicle_id,),
+        ).fetchone()
+    if row is None or row[0] < MIN_VISITS or not cost:
+        return None
+    average, spread = _stats(*row)
+    # A vehicle with near-identical visits would flag any change; allow 10% of the average.
+    threshold = average + ANOMALY_SIGMAS * max(spread, 0.1 * average)
+    if cost > threshold:
+        return (
+            f"{vehicle_id}: {int(cost):,} ugx is unusually high for this vehicle "
+            f"(average {average:,.0f} ugx over {row[0]} visits)."
+        )
+    return None
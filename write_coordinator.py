@@ -0,0 +1,155 @@
+"""Coordination of concurrent writers.
+
+- file_lock(path) serializes writers of one file across threads and processes
+  with an OS-level lock on a file in LOCK_DIR, so the output folders hold
+  only outputs.
+- atomic_write(path) hands out a temporary file next to `path` and moves it
+  into place with os.replace() only once it has been written completely, so
+  readers never see a half-written workbook. The file keeps the mode of the
+  one it replaces, or gets the umask default, as if written directly.
+- WriteBatcher collects writes that arrive within a short window and applies
+  them in one go (used by ledger.append_rows to commit simultaneous
+  submissions in a single transaction).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_DIR = os.path.join("static", "locks")
+
+# mkstemp() creates 0600 files; new outputs get what open() would give them.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_DEFAULT_MODE = 0o666 & ~_UMASK
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ~10 s; keep waiting like flock does.
+                continue
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def lock_path(path):
+    """The lock file in LOCK_DIR guarding `path`."""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(LOCK_DIR, f"{os.path.basename(path)}.{digest}.lock")
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock for writing `path`."""
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(lock_path(path), "a+b") as f:
+        _lock_file(f)
+        try:
+            yield
+        finally:
+            _unlock_file(f)
+
+
+@contextmanager
+def atomic_write(path, copy_existing=False):
+    """Yield a temporary path that replaces `path` when the block succeeds.
+
+    With copy_existing=True the temporary file starts as a copy of `path`,
+    for writers that modify a file in place (e.g. appending rows).
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        if copy_existing and os.path.exists(path):
+            shutil.copy2(path, tmp_path)
+        yield tmp_path
+        mode = os.stat(path).st_mode & 0o7777 if os.path.exists(path) else _DEFAULT_MODE
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def locked_write(path, copy_existing=False):
+    """file_lock() and atomic_write() together."""
+    with file_lock(path), atomic_write(path, copy_existing=copy_existing) as tmp_path:
+        yield tmp_path
+
+
+class _Pending:
+    def __init__(self, item):
+        self.item = item
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class WriteBatcher:
+    """Apply writes submitted within `window` seconds of each other together.
+
+    `flush(items)` receives the batched items in arrival order and returns one
+    result per item. submit() blocks until its item has been flushed and
+    returns that item's result (or raises the flush error).
+    """
+
+    def __init__(self, flush, window=0.2):
+        self._flush = flush
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending = []
+        self._collecting = False
+
+    def submit(self, item):
+        entry = _Pending(item)
+        with self._lock:
+            self._pending.append(entry)
+            leader = not self._collecting
+            self._collecting = True
+
+        if leader:
+            time.sleep(self.window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._collecting = False
+            try:
+                results = self._flush([pending.item for pending in batch])
+            except BaseException as exc:
+                for pending in batch:
+                    pending.error = exc
+                    pending.done.set()
+                raise
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.done.set()
+
+        entry.done.wait()
+        if entry.error is not None:
+            raise entry.error
+        return entry.result